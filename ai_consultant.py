@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+import http_client
+
+# --- AI 여행 상담 (Gemini 스트리밍) ---
+# 응답은 streamGenerateContent(SSE)로 받아 토큰이 도착하는 대로 넘겨준다.
+# 성공한 (모델, 도구) 조합을 프로세스 단위로 기억해, 다음 메시지부터는 실패하는 조합을 다시 시도하지 않는다.
+MODEL_CANDIDATES = ["gemini-2.0-flash", "gemini-2.5-flash", "gemini-1.5-flash", "gemini-pro"]
+TOOL_VARIANTS = [("google_search", [{"google_search": {}}]), ("googleSearchRetrieval", [{"googleSearchRetrieval": {}}]), (None, None)]
+API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent"
+
+MAX_TURNS = 12          # 원문 그대로 보내는 최근 메시지 수
+MAX_CONTEXT_CHARS = 8000  # 원문 구간의 최대 글자 수
+SUMMARY_ITEM_CHARS = 80   # 오래된 질문 요약 시 항목당 글자 수
+
+_memo = {"combo": None}
+_memo_lock = threading.Lock()
+
+def candidate_combos():
+    # 마지막으로 성공한 조합을 맨 앞으로
+    combos = [(m, name, tools) for m in MODEL_CANDIDATES for name, tools in TOOL_VARIANTS]
+    with _memo_lock:
+        last = _memo["combo"]
+    if last:
+        combos.sort(key=lambda c: (c[0], c[1]) != last)
+    return combos
+
+def remember_combo(model, tool_name):
+    with _memo_lock:
+        _memo["combo"] = (model, tool_name)
+
+def forget_combo():
+    with _memo_lock:
+        _memo["combo"] = None
+
+def estimate_tokens(text):
+    # 대략적인 토큰 수 (한글은 글자당 토큰이 더 많아 2자, 그 외 4자 기준)
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul // 2 + (len(text) - hangul) // 4 + 1
+
+def build_contents(messages, max_turns=MAX_TURNS, max_chars=MAX_CONTEXT_CHARS):
+    # 최근 대화는 원문으로, 그보다 오래된 사용자 질문은 한 줄씩 요약해 시스템 지시에 붙인다
+    history = [m for m in messages if m.get("content")]
+    while history and history[0]["role"] != "user": history = history[1:]
+    recent, used = [], 0
+    for m in reversed(history):
+        if len(recent) >= max_turns or (recent and used + len(m["content"]) > max_chars): break
+        recent.append(m); used += len(m["content"])
+    recent.reverse()
+    while recent and recent[0]["role"] != "user": recent = recent[1:]
+    older = history[:len(history) - len(recent)]
+    summary = [m["content"].replace("\n", " ")[:SUMMARY_ITEM_CHARS] for m in older if m["role"] == "user"]
+    contents = [{"role": "user" if m["role"] == "user" else "model", "parts": [{"text": m["content"]}]} for m in recent]
+    return contents, summary
+
+def build_payload(messages, tools=None, today=None):
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    contents, summary = build_contents(messages)
+    system = f"Today is {today}. Use search for latest info. Do not write code."
+    if summary: system += "\nEarlier questions in this conversation:\n" + "\n".join(f"- {s}" for s in summary)
+    payload = {"systemInstruction": {"parts": [{"text": system}]}, "contents": contents}
+    if tools: payload["tools"] = tools
+    return payload
+
+def _iter_sse(res):
+    res.encoding = "utf-8"  # SSE 는 항상 UTF-8 (charset 이 없으면 requests 가 latin-1 로 읽어 줄바꿈이 깨짐)
+    for line in res.iter_lines(decode_unicode=True):
+        if line and line.startswith("data:"):
+            yield json.loads(line[5:].strip())
+
+def stream_reply(api_key, messages, stats):
+    # 텍스트 조각을 yield 하는 제너레이터. stats 에 모델/도구/지연/페이로드/토큰 정보를 채운다
+    stats.update(ok=False, model=None, tools=None, probes=0)
+    t0 = time.perf_counter()
+    for model, tool_name, tools in candidate_combos():
+        payload = build_payload(messages, tools)
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        stats["probes"] += 1
+        try:
+            res = http_client.post(API_URL.format(model=model), params={"alt": "sse", "key": api_key},
+                                   headers={"Content-Type": "application/json"}, data=body, stream=True, retries=1)
+        except Exception:
+            continue
+        if res.status_code != 200:
+            res.close()
+            continue
+        stats.update(model=model, tools=tool_name, payload_bytes=len(body), context_messages=len(payload["contents"]),
+                     est_prompt_tokens=estimate_tokens(body.decode("utf-8")))
+        first, chars, error = None, 0, None
+        try:
+            for chunk in _iter_sse(res):
+                if "usageMetadata" in chunk:
+                    usage = chunk["usageMetadata"]
+                    stats.update(prompt_tokens=usage.get("promptTokenCount"), reply_tokens=usage.get("candidatesTokenCount"))
+                for cand in chunk.get("candidates", []):
+                    for part in cand.get("content", {}).get("parts", []):
+                        text = part.get("text")
+                        if text:
+                            if first is None: first = time.perf_counter() - t0
+                            chars += len(text)
+                            yield text
+        except (requests.RequestException, ValueError) as e:
+            # 스트림 도중 연결 끊김·타임아웃, JSON 이 아닌 data: 줄 -> 받은 데까지만 두고 실패로 처리
+            error = type(e).__name__
+        finally:
+            res.close()
+        ok = chars > 0 and error is None
+        # 실제로 답이 온 조합만 기억한다 (빈 응답·차단된 응답이 이후 메시지를 붙잡지 않도록)
+        if ok: remember_combo(model, tool_name)
+        else: forget_combo()
+        stats.update(ok=ok, error=error, first_token_ms=round((first or 0) * 1000), total_ms=round((time.perf_counter() - t0) * 1000), reply_chars=chars)
+        return
+    forget_combo()
+    stats["total_ms"] = round((time.perf_counter() - t0) * 1000)
@@ -1,16 +1,30 @@
 import streamlit as st
-import requests
+import http_client
+from disk_cache import disk_cached, get_cache, make_key
+import singleflight
+from singleflight import single_flight
+import timing
+from timing import timed
 import pandas as pd
-import math
+import numpy as np
 from datetime import datetime, timedelta
-import pydeck as pdk
-from fpdf import FPDF
 import os
 import time
-from PIL import Image, ImageDraw, ImageFont
-import base64
-from io import BytesIO
-import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from gazetteer import Gazetteer
+from holiday_store import HolidayStore, get_holidays_for_year
+from scoring import MODE_USE_HOLIDAYS, PRIORITY_MODES, calculate_daily_score
+from route_optimizer import optimize_route
+from itinerary import plan_itinerary
+from report import lazy_pdf_report, lazy_pdf_batch
+from ai_consultant import stream_reply
+from poi_index import OVERPASS_URL, PoiStore, union_query
+from climatology import ClimateStore, day_slots
+from leaderboard import build_leaderboard, missing_holidays, select_cities
+from ranking import MIN_NIGHTS, MAX_NIGHTS, window_score_matrix, rank_windows, heatmap_frame
 
 # --- 설정: 테마 매핑 ---
 THEME_OSM_MAP = {
@@ -20,9 +34,21 @@ THEME_OSM_MAP = {
     "휴양/공원 🌳": '"leisure"="park"'
 }
 
+# --- 루트 최적화 설정 ---
+END_FREE = "자유 (마지막 도시 자동)"
+ROUTE_TIME_BUDGET = 0.5  # 루트 지역 탐색 + 일정 순서 개선에 함께 쓰는 시간 제한 (초)
+STAY_RANGE = (2, 14)     # 도시별 체류 일수 기본 범위 (박)
+WEATHER_BATCH_SIZE = 50  # 날씨 묶음 요청 하나에 넣을 최대 도시 수
+
 # --- 2. API 키 확인 ---
-CALENDARIFIC_KEY = st.secrets.get("calendarific_key")
-GEMINI_KEY = st.secrets.get("gemini_key")
+def get_secret(name):
+    # secrets.toml 이 없으면 (헤드리스 벤치마크 등) 같은 이름의 대문자 환경 변수
+    try: value = st.secrets.get(name)
+    except FileNotFoundError: value = None
+    return value or os.environ.get(name.upper())
+
+CALENDARIFIC_KEY = get_secret("calendarific_key")
+GEMINI_KEY = get_secret("gemini_key")
 
 def check_api_keys():
     if not CALENDARIFIC_KEY:
@@ -33,76 +59,55 @@ def check_api_keys():
         st.stop()
 
 # --- 3. 유틸리티 함수 ---
-@st.cache_data(ttl=3600)
+@timed("fetch.exchange_rates")
+@single_flight
+@disk_cached("exchange_rates")
 def get_exchange_rates(base="KRW"):
     try:
         url = f"https://open.er-api.com/v6/latest/{base}"
-        response = requests.get(url)
+        response = http_client.get(url)
         data = response.json()
         return data['rates']
     except: return None
 
-def download_korean_font():
-    font_path = "NanumGothic.ttf"
-    if not os.path.exists(font_path):
-        url = "https://github.com/google/fonts/raw/main/ofl/nanumgothic/NanumGothic-Regular.ttf"
-        r = requests.get(url)
-        with open(font_path, "wb") as f:
-            f.write(r.content)
-    return font_path
-
-def create_pdf_report(title, content_list):
-    pdf = FPDF()
-    pdf.add_page()
-    font_path = download_korean_font()
-    pdf.add_font('Nanum', '', font_path)
-    pdf.set_font('Nanum', '', 12)
-    pdf.set_font('Nanum', '', 16)
-    pdf.cell(0, 10, title, ln=True, align='C')
-    pdf.ln(10)
-    pdf.set_font('Nanum', '', 10)
-    for line in content_list:
-        pdf.multi_cell(0, 8, line)
-        pdf.ln(2)
-    temp_filename = "temp_report.pdf"
-    pdf.output(temp_filename)
-    with open(temp_filename, "rb") as f:
-        pdf_bytes = f.read()
-    return pdf_bytes
-
-def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return R * c
-
-# --- 1. 내장 도시 데이터 (JSON 파일 로드) ---
-@st.cache_data
-def load_fallback_cities():
-    file_path = "city_coordinates.json"
-    if not os.path.exists(file_path):
-        return {} 
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-FALLBACK_CITIES = load_fallback_cities()
+# --- 1. 내장 도시 데이터 (오프라인 가제티어) ---
+# JSON(또는 같은 내용의 .npz) 도시 목록을 색인해 별칭·접두어·오타 허용 검색을 메모리에서 처리
+# 처음 검색할 때 한 번 읽어 프로세스 전체가 공유한다
+CITY_DATA_PATH = os.environ.get("TRAVEL_CITY_DATA", "city_coordinates.json")
+CITY_OPTIONS_LIMIT = 5000  # 자동완성 옵션으로 브라우저에 보낼 최대 이름 수 (그 밖의 도시는 직접 입력해 검색)
+
+@st.cache_resource
+def load_gazetteer(path=CITY_DATA_PATH):
+    return Gazetteer.load(path)
+
+def city_input(label, key, on_change, placeholder=None):
+    # 입력하는 동안 가제티어 이름·별칭을 브라우저에서 바로 걸러 보여 주고, 목록에 없는 이름은 그대로 검색한다
+    st.selectbox(label, load_gazetteer().labels(CITY_OPTIONS_LIMIT), index=None, key=key, on_change=on_change,
+                 placeholder=placeholder or "도시명을 입력하세요", accept_new_options=True)
+
+def city_suggestions(query, found=None, limit=5):
+    # 정확히 일치하지 않은 검색어에 대한 "혹시 이 도시?" 후보 (이미 찾은 도시는 제외)
+    gazetteer = load_gazetteer()
+    if gazetteer.lookup(query): return []
+    return [c['name'] for c in gazetteer.suggest(query, limit) if not found or c['name'] != found['name']]
 
 @st.cache_data(ttl=3600)
 def search_city_coordinates(city_name):
-    clean_name = city_name.strip().replace(" ", "")
-    # JSON 파일에서 먼저 검색
-    if clean_name in FALLBACK_CITIES:
-        data = FALLBACK_CITIES[clean_name]
-        return {"name": city_name, "lat": data['lat'], "lon": data['lon'], "country_code": data['code']}
-    # 없으면 OSM API 검색
+    # 가제티어에서 먼저 검색 (이름 / 별칭 정확 일치)
+    hit = load_gazetteer().search(city_name)
+    if hit:
+        return {"name": hit['name'], "lat": hit['lat'], "lon": hit['lon'], "country_code": hit['code']}
+    # 없으면 OSM API 검색 (오타 후보는 city_suggestions 로 따로 제안)
+    return search_city_nominatim(city_name)
+
+@timed("fetch.geocode")
+@single_flight
+@disk_cached("geocode")
+def search_city_nominatim(city_name):
     try:
         url = "https://nominatim.openstreetmap.org/search"
         params = {"q": city_name, "format": "json", "limit": 1, "accept-language": "ko"}
-        headers = {'User-Agent': 'TravelApp_Student_Project/1.0 (contact@example.com)'}
-        res = requests.get(url, params=params, headers=headers)
+        res = http_client.get(url, params=params)
         res.raise_for_status()
         data = res.json()
         if data:
@@ -110,72 +115,175 @@ def search_city_coordinates(city_name):
         return None
     except: return None
 
+# --- 동시 호출 레이어 ---
+# 서로 독립적인 업스트림 호출을 스레드 풀에서 병렬 실행 (st.cache_data 는 그대로 적용됨)
+# 스트림릿은 재실행마다 이 파일을 다시 실행하므로, 풀·저장소처럼 프로세스에 하나만 있어야 할 객체는 cache_resource 로 만든다
+FETCH_TIMEOUT = 30
+
+@st.cache_resource
+def fetch_pool():
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="fetch")
+
+_FETCH_POOL = fetch_pool()
+
+def fetch_concurrently(calls, timeout=FETCH_TIMEOUT):
+    # calls: {key: (func, *args)} -> (results, failed) / 실패·지연된 키의 결과는 None
+    ctx = get_script_run_ctx()
+    def run(fn, args):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+    futures = {_FETCH_POOL.submit(run, fn, args): key for key, (fn, *args) in calls.items()}
+    done, _ = wait(futures, timeout=timeout)
+    results, failed = {}, []
+    for fut, key in futures.items():
+        try: results[key] = fut.result() if fut in done else None
+        except Exception: results[key] = None
+        if results[key] is None: failed.append(key)
+    return results, failed
+
+# --- 환율: 첫 화면을 막지 않도록 백그라운드에서 갱신 ---
+RATES_TTL = 3600
+RATES_RETRY = 60  # 받기에 실패했을 때 다시 시도하기까지 (초)
+
+class BackgroundValue:
+    # fetch() 결과를 프로세스 전체가 공유하고, ttl 이 지나면 백그라운드에서 다시 받는다 (그동안은 마지막 값)
+    def __init__(self, fetch, ttl, retry=RATES_RETRY):
+        self.fetch, self.ttl, self.retry = fetch, ttl, retry
+        self.value, self.fetched, self.tried, self.job = None, 0.0, 0.0, None
+        self.lock = threading.Lock()
+
+    def _run(self):
+        value = self.fetch()
+        with self.lock:
+            self.tried = time.time()
+            if value is not None: self.value, self.fetched = value, self.tried
+        return value
+
+    def refresh(self):
+        # 이미 진행 중인 갱신이 있으면 그 작업을 반환
+        with self.lock:
+            if self.job is None or self.job.done(): self.job = _FETCH_POOL.submit(self._run)
+            return self.job
+
+    def get(self, wait=0):
+        # 마지막 값을 바로 반환. 첫 시도가 끝나기 전이면 최대 wait 초까지 기다린다
+        with self.lock:
+            now, value, first = time.time(), self.value, not self.tried
+            due = now - self.fetched > self.ttl and now - self.tried > self.retry
+        if not due: return value
+        job = self.refresh()
+        if first and wait:
+            try: value = job.result(timeout=wait)
+            except Exception: pass
+        return value
+
+@st.cache_resource
+def exchange_rates():
+    rates = BackgroundValue(get_exchange_rates, RATES_TTL)
+    rates.refresh()
+    return rates
+
+EXCHANGE_RATES = exchange_rates()  # 모듈을 불러오는 즉시 (첫 화면을 그리기 전에) 받기 시작
+
 # --- API 함수들 ---
-@st.cache_data(ttl=3600)
-def get_holidays_for_period(api_key, country_code, start_date, end_date):
-    all_holidays = set()
-    if not country_code: return all_holidays
-    for month_start in pd.date_range(start_date, end_date, freq='MS'):
-        try:
-            url = "https://calendarific.com/api/v2/holidays"
-            params = {"api_key": api_key, "country": country_code, "year": month_start.year, "month": month_start.month}
-            res = requests.get(url, params=params)
-            if res.status_code == 200:
-                for h in res.json().get("response", {}).get("holidays", []):
-                    if h.get("date", {}).get("iso"): all_holidays.add(h["date"]["iso"].split("T")[0])
-        except: pass
-    return all_holidays
+@st.cache_resource
+def holiday_store():
+    return HolidayStore(lambda country_code, year: get_holidays_for_year(CALENDARIFIC_KEY, country_code, year))
+
+HOLIDAY_STORE = holiday_store()
+
+def holiday_mask(country_code, dates):
+    try: return HOLIDAY_STORE.contains(country_code, dates)
+    except LookupError: return np.zeros(len(dates), dtype=bool)
 
 @st.cache_data(ttl=3600)
+@timed("fetch.weather")
+@single_flight
+@disk_cached("weather_archive")
 def get_historical_weather(lat, lon, start, end):
     try:
         url = "https://archive-api.open-meteo.com/v1/archive"
         params = {"latitude": lat, "longitude": lon, "start_date": start, "end_date": end, "daily": "temperature_2m_max,precipitation_sum", "timezone": "auto"}
-        res = requests.get(url, params=params)
+        res = http_client.get(url, params=params)
         res.raise_for_status()
         return res.json()
     except: return None
 
-@st.cache_data(ttl=3600)
-def get_places_osm(lat, lon, osm_tag):
+@timed("fetch.weather_batch")
+@single_flight
+@disk_cached("weather_archive")
+def get_historical_weather_batch(coords, start, end):
+    # 여러 좌표를 한 번에 조회 (Open-Meteo 는 좌표 목록을 받으면 위치별 응답 리스트를 돌려줌)
     try:
-        query = f"""[out:json];(node[{osm_tag}](around:3000, {lat}, {lon});way[{osm_tag}](around:3000, {lat}, {lon}););out center 10;"""
-        res = requests.get("http://overpass-api.de/api/interpreter", params={'data': query})
+        url = "https://archive-api.open-meteo.com/v1/archive"
+        params = {"latitude": ",".join(str(la) for la, _ in coords), "longitude": ",".join(str(lo) for _, lo in coords),
+                  "start_date": start, "end_date": end, "daily": "temperature_2m_max,precipitation_sum", "timezone": "auto"}
+        res = http_client.get(url, params=params, timeout=(5, 60))
         res.raise_for_status()
         data = res.json()
-        places = []
-        for el in data.get('elements', []):
-            name = el.get('tags', {}).get('name')
-            if name:
-                plat = el.get('lat') or el.get('center', {}).get('lat')
-                plon = el.get('lon') or el.get('center', {}).get('lon')
-                places.append({"장소명": name, "지도 보기": f"https://www.google.com/maps/search/?api=1&query={plat},{plon}"})
-        return pd.DataFrame(places)
-    except: return pd.DataFrame()
-
-def create_base_dataframe(weather_json, start_date, end_date):
+        return data if isinstance(data, list) else [data]
+    except: return None
+
+def route_weather_calls(route, windows, chunk=WEATHER_BATCH_SIZE):
+    # 전체 체류 기간을 하나로 합쳐 도시 chunk 개마다 요청 하나 -> fetch_concurrently 용 호출 목록
+    start = min(s for s, _ in windows).strftime('%Y-%m-%d')
+    end = max(e for _, e in windows).strftime('%Y-%m-%d')
+    coords = [(c['lat'], c['lon']) for c in route]
+    return {("weather", i): (get_historical_weather_batch, tuple(coords[i:i + chunk]), start, end) for i in range(0, len(coords), chunk)}
+
+def split_route_weather(results, windows, chunk=WEATHER_BATCH_SIZE):
+    # 묶음 응답을 도시별 체류 기간만 잘라 get_historical_weather 와 같은 형태로 되돌림
+    out = []
+    for idx, (s, e) in enumerate(windows):
+        batch = results.get(("weather", idx - idx % chunk))
+        loc = batch[idx % chunk] if batch and idx % chunk < len(batch) else None
+        if not loc or 'daily' not in loc: out.append(None); continue
+        days = pd.to_datetime(loc['daily']['time'])
+        keep = (days >= pd.Timestamp(s)) & (days <= pd.Timestamp(e))
+        out.append({"daily": {k: [v for v, m in zip(vals, keep) if m] for k, vals in loc['daily'].items()}})
+    return out
+
+@timed("fetch.poi")
+@single_flight
+@disk_cached("poi")
+def fetch_osm_elements(centers, osm_tags, radius):
+    # 여러 지역 x 모든 테마를 하나의 Overpass union 쿼리로 조회 (실패 시 None)
+    try:
+        res = http_client.post(OVERPASS_URL, data={'data': union_query(centers, osm_tags, radius)}, timeout=(5, 90))
+        res.raise_for_status()
+        return res.json().get('elements', [])
+    except: return None
+
+@st.cache_resource
+def poi_store():
+    return PoiStore(fetch_osm_elements, THEME_OSM_MAP)
+
+@st.cache_resource
+def climate_store():
+    return ClimateStore()
+
+POI_STORE = poi_store()
+CLIMATE_STORE = climate_store()
+
+def get_places_osm(lat, lon, osm_tag, top_n=10):
+    theme = next(t for t, tag in THEME_OSM_MAP.items() if tag == osm_tag)
+    return POI_STORE.query(lat, lon, theme, top_n=top_n)
+
+def create_base_dataframe(weather_json, start_date, end_date, climate=None):
+    # climate(ClimateSeries)가 있으면 네트워크 없이 다년 평균/표준편차 컬럼으로 구성
+    if climate is not None: return climate.frame(start_date, end_date)
     if not weather_json or 'daily' not in weather_json: return pd.DataFrame()
     df = pd.DataFrame(weather_json['daily'])
     df['date'] = pd.to_datetime(df['time'])
     df = df.set_index('date').drop(columns='time')
     return df
 
-def calculate_daily_score(df, local_holidays, kr_holidays, priority_mode):
-    date_str = df.index.strftime('%Y-%m-%d')
-    df['is_local_holiday'] = date_str.isin(local_holidays)
-    df['is_kr_holiday'] = date_str.isin(kr_holidays)
-    df['is_weekend'] = df.index.dayofweek >= 5
-    df['is_free_day'] = df['is_kr_holiday'] | df['is_weekend']
-    df['score_weather'] = 10 - abs(df['temperature_2m_max'] - 23)
-    df['score_rain'] = -df['precipitation_sum'] * 2
-    if priority_mode == "비용 절감 (휴일 제외)":
-        df['score_busy'] = (df['is_local_holiday'] | df['is_kr_holiday'] | df['is_weekend']).astype(int) * -10
-        df['score_free'] = 0 
-    else:
-        df['score_busy'] = (df['is_local_holiday'] | df['is_weekend']).astype(int) * -5
-        df['score_free'] = df['is_free_day'].astype(int) * 5
-    df['total_score'] = df['score_weather'] + df['score_rain'] + df['score_busy'] + df['score_free']
-    return df
+def align_to_dates(df, dates):
+    # 작년 날씨 행을 같은 연중 일자의 날짜로 옮긴다 (작년에 없는 2/29 같은 날은 NaN)
+    if df.empty: return df
+    by_slot = df.set_axis(day_slots(df.index))
+    by_slot = by_slot[~by_slot.index.duplicated()]
+    return by_slot.reindex(day_slots(dates)).set_axis(pd.DatetimeIndex(dates, name="date"))
 
 def get_packing_tips(avg_temp, rain_sum):
     tips = []
@@ -197,20 +305,144 @@ def get_google_images_link(city_name):
 def get_flight_link(destination_name):
     return f"https://www.google.com/travel/flights?q=Flights+to+{destination_name.split(',')[0]}"
 
-def draw_route_map(route_cities):
+def draw_route_map(route_cities, round_trip=False):
+    import pydeck as pdk  # 루트 지도에서만 쓰므로 필요할 때 불러온다
     map_data = []
     for i, city in enumerate(route_cities):
         map_data.append({"coordinates": [city['lon'], city['lat']], "name": f"{i+1}. {city['name'].split(',')[0]}", "size": 50000, "color": [0, 200, 100, 200]})
     scatter_layer = pdk.Layer("ScatterplotLayer", data=map_data, get_position="coordinates", get_fill_color="color", get_radius="size", pickable=True, radius_scale=1, radius_min_pixels=10, radius_max_pixels=30)
     text_layer = pdk.Layer("TextLayer", data=map_data, get_position="coordinates", get_text="name", get_size=18, get_color=[0, 0, 0], get_angle=0, get_text_anchor="middle", get_alignment_baseline="bottom", pixel_offset=[0, -20])
     line_data = [{"start_coords": [route_cities[i]['lon'], route_cities[i]['lat']], "end_coords": [route_cities[i+1]['lon'], route_cities[i+1]['lat']]} for i in range(len(route_cities)-1)]
+    if round_trip and len(route_cities) > 1: line_data.append({"start_coords": [route_cities[-1]['lon'], route_cities[-1]['lat']], "end_coords": [route_cities[0]['lon'], route_cities[0]['lat']]})
     line_layer = pdk.Layer("LineLayer", data=line_data, get_source_position="start_coords", get_target_position="end_coords", get_color=[80, 80, 80, 200], get_width=3)
     view_state = pdk.ViewState(latitude=route_cities[0]['lat'], longitude=route_cities[0]['lon'], zoom=3)
     st.pydeck_chart(pdk.Deck(layers=[line_layer, scatter_layer, text_layer], initial_view_state=view_state, map_style=None, tooltip={"text": "{name}"}))
 
+def draw_window_heatmap(df, matrix):
+    import altair as alt
+    heat = heatmap_frame(df.index, matrix)
+    chart = alt.Chart(heat).mark_rect().encode(
+        x=alt.X("시작일:T", title="시작일"), y=alt.Y("기간(박):O", title="기간 (박)"),
+        color=alt.Color("점수:Q", scale=alt.Scale(scheme="redyellowgreen")),
+        tooltip=[alt.Tooltip("시작일:T"), "기간(박):O", alt.Tooltip("점수:Q", format=".1f")])
+    st.altair_chart(chart, use_container_width=True)
+
+# --- 분석 결과 메모 (세션 단위) ---
+# 다운로드 클릭·사이드바 조작처럼 입력이 그대로인 재실행에서는 계산을 건너뛰고 저장된 결과를 다시 그린다.
+RESULT_MEMO_SIZE = 8  # 세션마다 보관할 결과 수 (LRU)
+
+def input_key(mode, *inputs):
+    return make_key(mode, inputs, {})
+
+def recall_result(key):
+    memo = st.session_state.get("result_memo")
+    if not memo or key not in memo: return None
+    memo.move_to_end(key)
+    return memo[key]
+
+def remember_result(key, result):
+    memo = st.session_state.setdefault("result_memo", OrderedDict())
+    memo[key] = result
+    while len(memo) > RESULT_MEMO_SIZE: memo.popitem(last=False)
+    return result
+
+@st.fragment
+def download_buttons(buttons):
+    # buttons: [(라벨, 지연 생성 함수, 파일명)] / 다운로드는 앱을 다시 실행하지 않는다
+    for col, (label, data, file_name) in zip(st.columns(len(buttons)), buttons):
+        col.download_button(label, data, file_name, "application/pdf", on_click="ignore")
+
+@st.fragment
+def exchange_calculator():
+    # 금액·통화를 바꿔도 이 영역만 다시 그린다. 환율은 화면을 다 그린 뒤에 기다린다
+    st.subheader("💸 환율 계산기")
+    rates = EXCHANGE_RATES.get(wait=FETCH_TIMEOUT)
+    if not rates: st.caption("환율 정보를 불러오지 못했습니다.")
+    else:
+        amt = st.number_input("KRW 입력", 10000, step=1000)
+        curr = st.selectbox("통화", ["USD", "JPY", "EUR", "CNY"])
+        st.metric(f"{curr} 환산", f"{amt * rates.get(curr, 0):,.2f}")
+
 # --- 실행 함수들 ---
 
-# 단기 여행: 엔터 검색 및 입력창 초기화 적용
+# 단기 여행 분석: 화면과 분리된 계산 결과 (세션 메모에 저장됨)
+def analyze_single_trip(city_data, theme, s, e, mode, dur, budget, style):
+    hs, he = s - pd.DateOffset(years=1), e - pd.DateOffset(years=1)
+    res, failed = fetch_concurrently({
+        "climate": (CLIMATE_STORE.get, city_data['lat'], city_data['lon']),
+        "local": (HOLIDAY_STORE.between, city_data['country_code'], s, e),
+        "kr": (HOLIDAY_STORE.between, "KR", s, e),
+        "places": (get_places_osm, city_data['lat'], city_data['lon'], THEME_OSM_MAP[theme]),
+    })
+    result = {"warnings": [], "caption": None, "complete": not failed}
+    places = res["places"] if res["places"] is not None else pd.DataFrame()
+    if "local" in failed or "kr" in failed: result["warnings"].append("⚠️ 공휴일 정보를 일부 불러오지 못해 휴일 없이 계산합니다.")
+    if "places" in failed: result["warnings"].append("⚠️ 장소 데이터를 불러오지 못했습니다. 다시 분석하면 재시도합니다.")
+    if res["climate"] is not None:
+        df = create_base_dataframe(None, hs, he, res["climate"])
+        result["caption"] = f"📊 최근 {len(res['climate'].years)}년 ({res['climate'].years[0]}~{res['climate'].years[-1]}) 평균 날씨 기준"
+    else:
+        result["warnings"].append("⚠️ 다년 기후 데이터를 불러오지 못해 작년 날씨로 계산합니다.")
+        df = create_base_dataframe(get_historical_weather(city_data['lat'], city_data['lon'], hs.strftime('%Y-%m-%d'), he.strftime('%Y-%m-%d')), hs, he)
+    if df.empty: return dict(result, error="데이터 부족")
+    # 작년 날씨 행을 실제 여행 날짜로 옮겨 공휴일·주말 여부를 판정 (연도 데이터는 위에서 이미 적재됨)
+    trip_dates = df.index + pd.DateOffset(years=1)
+    lh = holiday_mask(city_data['country_code'], trip_dates) if "local" not in failed else np.zeros(len(df), dtype=bool)
+    kh = holiday_mask("KR", trip_dates) if "kr" not in failed else np.zeros(len(df), dtype=bool)
+    df = calculate_daily_score(df, lh, kh, mode, trip_dates)
+    # 모든 기간(3~14박)을 한 번에 계산하고 Top 3 윈도우만 잘라낸다
+    matrix = window_score_matrix(df['total_score'].to_numpy())
+    pdf_list = [f"도시: {city_data['name']}", f"테마: {theme}", ""]
+    top3, window_reports = [], []
+    for i, scr in rank_windows(df, dur, 3, matrix):
+        win = df.iloc[i : i + dur]
+        ps, pe = (win.index[0]+pd.DateOffset(years=1)).strftime('%Y-%m-%d'), (win.index[-1]+pd.DateOffset(years=1)).strftime('%Y-%m-%d')
+        tm, rn = win['temperature_2m_max'].mean(), win['precipitation_sum'].sum()
+        fr = win['is_free_day'].sum()
+        co = calculate_travel_cost(budget, dur, style)
+        tp = get_packing_tips(tm, rn)
+        spread = f"📈 연도별 편차: 기온 ±{win['temperature_2m_max_std'].mean():.1f}°C / 일 강수 ±{win['precipitation_sum_std'].mean():.1f}mm" if 'temperature_2m_max_std' in win else None
+        n = len(top3) + 1
+        top3.append({"ps": ps, "pe": pe, "tm": tm, "rn": rn, "fr": fr, "co": co, "tp": tp, "spread": spread})
+        pdf_list.append(f"[{n}위] {ps}~{pe} / {tm:.1f}도 / {co:,}원")
+        window_reports.append((f"{n}위: {ps}~{pe}", [f"도시: {city_data['name']}", f"테마: {theme}", "", f"기온: {tm:.1f}°C", f"강수: {rn:.1f}mm", f"휴일: {fr}일", f"경비: {co:,}원", f"준비물: {tp}"]))
+    return dict(result, places=places, df=df, matrix=matrix, top3=top3, pdf_list=pdf_list, window_reports=window_reports)
+
+def show_single_trip(city_data, theme, result):
+    for w in result["warnings"]: st.warning(w)
+    if result.get("error"): st.error(result["error"]); return
+    if result["caption"]: st.caption(result["caption"])
+
+    st.divider()
+    st.subheader(f"🗺️ '{theme}' 추천 장소")
+    places = result["places"]
+    if not places.empty: st.dataframe(places, column_config={"지도 보기": st.column_config.LinkColumn("구글 지도", display_text="📍 지도")}, hide_index=True)
+    else: st.info("장소 데이터 없음")
+
+    st.write("---")
+    st.subheader("🔥 시작일 x 기간 점수 분포")
+    draw_window_heatmap(result["df"], result["matrix"])
+
+    st.write("---")
+    st.subheader("🏆 Top 3 일정")
+    for i, p in enumerate(result["top3"]):
+        with st.expander(f"{['🥇','🥈','🥉'][i] if i<3 else ''} {i+1}위: {p['ps']}~{p['pe']}", expanded=(i==0)):
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("기온", f"{p['tm']:.1f}°C")
+            c2.metric("강수", f"{p['rn']:.1f}mm")
+            c3.metric("휴일", f"{p['fr']}일")
+            c4.metric("경비", f"{p['co']//10000}만 원")
+            if p['spread']: st.caption(p['spread'])
+            st.info(f"🧳 {p['tp']}")
+            st.link_button("✈️ 항공권 검색", get_flight_link(city_data['name']))
+
+    # PDF 는 다운로드 버튼을 눌렀을 때만 렌더링
+    download_buttons([
+        ("📄 PDF 다운로드", lazy_pdf_report(f"Travel Plan: {city_data['name'].split(',')[0]}", result["pdf_list"]), "Trip.pdf"),
+        ("📚 Top 3 상세 PDF", lazy_pdf_batch(result["window_reports"]), "Trip_Top3.pdf"),
+    ])
+
+# 단기 여행: 자동완성 검색 및 입력창 초기화 적용
 def run_mode_single_trip():
     st.header("🧳 개인 맞춤형 여행 추천")
 
@@ -220,17 +452,22 @@ def run_mode_single_trip():
         if query:
             with st.spinner("위치 확인 중..."):
                 st.session_state.search_result = search_city_coordinates(query)
-            st.session_state.single_city_input = ""  # 입력창 초기화
+            st.session_state.single_suggestions = city_suggestions(query, st.session_state.search_result)
+            st.session_state.single_city_input = None  # 입력창 초기화
+
+    # 콜백 함수: 추천 후보 선택
+    def handle_pick():
+        pick = st.session_state.single_pick
+        if pick:
+            st.session_state.search_result = search_city_coordinates(pick)
+            st.session_state.single_suggestions = []
 
     if "search_result" not in st.session_state: st.session_state.search_result = None
 
-    c1, c2 = st.columns([3, 1], vertical_alignment="bottom") 
-    with c1: 
-        # on_change로 엔터 입력 시 검색 실행
-        st.text_input("✈️ 어디로 떠나시나요?", placeholder="도시명 (예: 파리, 도쿄)", key="single_city_input", on_change=handle_search)
-    with c2: 
-        # 버튼 클릭 시에도 동일한 로직 실행
-        st.button("도시 검색 🔍", on_click=handle_search, use_container_width=True)
+    # 입력 중 자동완성, 후보를 고르거나 엔터를 누르면 검색 실행
+    city_input("✈️ 어디로 떠나시나요?", "single_city_input", handle_search, "도시명 (예: 파리, 도쿄)")
+    if st.session_state.get("single_suggestions"):
+        st.pills("🔎 혹시 이 도시인가요?", st.session_state.single_suggestions, key="single_pick", on_change=handle_pick)
 
     if st.session_state.search_result:
         city_data = st.session_state.search_result
@@ -242,84 +479,187 @@ def run_mode_single_trip():
             with c1: theme = st.selectbox("테마", options=THEME_OSM_MAP.keys())
             with c2: budget = st.number_input("1일 예산 (원)", 200000, step=10000)
             style = st.radio("스타일", ["절약", "일반", "럭셔리"], index=1, horizontal=True)
-            mode = st.radio("우선순위", ["연차 효율 (휴일 포함)", "비용 절감 (휴일 제외)"], horizontal=True)
+            mode = st.radio("우선순위", PRIORITY_MODES, horizontal=True)
             today = datetime.now().date()
             dates = st.date_input("기간", value=(today+timedelta(30), today+timedelta(90)), min_value=today, max_value=today+timedelta(365))
-            dur = st.slider("여행 기간 (박)", 3, 14, 5)
+            dur = st.slider("여행 기간 (박)", MIN_NIGHTS, MAX_NIGHTS, 5)
             submit = st.form_submit_button("🚀 분석 시작")
 
+        # 제출된 입력이 그대로면 (다운로드·사이드바 조작 등으로 인한 재실행) 저장된 결과를 다시 그린다
+        key = input_key("single", city_data, theme, budget, style, mode, tuple(dates), dur)
+        result = recall_result(key)
         if submit:
-            if len(dates) < 2: st.error("기간을 선택하세요."); st.stop()
-            s, e = dates
-            hs, he = s - pd.DateOffset(years=1), e - pd.DateOffset(years=1)
-            with st.spinner("분석 중..."):
-                w = get_historical_weather(city_data['lat'], city_data['lon'], hs.strftime('%Y-%m-%d'), he.strftime('%Y-%m-%d'))
-                lh = get_holidays_for_period(CALENDARIFIC_KEY, city_data['country_code'], s, e)
-                kh = get_holidays_for_period(CALENDARIFIC_KEY, "KR", s, e)
-                places = get_places_osm(city_data['lat'], city_data['lon'], THEME_OSM_MAP[theme])
-                df = create_base_dataframe(w, hs, he)
-                if df.empty: st.error("데이터 부족"); st.stop()
-                df = calculate_daily_score(df, lh, kh, mode)
-                best = []
-                for i in range(len(df) - dur + 1):
-                    win = df.iloc[i : i + dur]
-                    best.append({"s": win.index[0]+pd.DateOffset(years=1), "e": win.index[-1]+pd.DateOffset(years=1), "scr": win['total_score'].mean(), "win": win})
-                best.sort(key=lambda x: x['scr'], reverse=True)
-                top3 = best[:3]
-
-                st.divider()
-                st.subheader(f"🗺️ '{theme}' 추천 장소")
-                if not places.empty: st.dataframe(places, column_config={"지도 보기": st.column_config.LinkColumn("구글 지도", display_text="📍 지도")}, hide_index=True)
+            if len(dates) < 2: st.error("기간을 선택하세요."); return
+            if result is None or not result["complete"]:
+                with st.spinner("분석 중..."):
+                    result = remember_result(key, analyze_single_trip(city_data, theme, *dates, mode, dur, budget, style))
+        if result is not None: show_single_trip(city_data, theme, result)
+
+# 장기 여행 계획: 도시별 일별 점수 + 이동 거리로 방문 순서와 체류 일수를 함께 최적화 (화면과 분리된 계산 결과)
+def plan_long_trip(cities, start_name, end_name, round_trip, start_date, total_weeks, daily_budget, priority_mode=MODE_USE_HOLIDAYS, stay_range=STAY_RANGE):
+    names = [c['name'] for c in cities]
+    start_idx, end_idx = names.index(start_name), (names.index(end_name) if end_name != END_FREE else None)
+    total_days = total_weeks * 7
+    trip_days = pd.date_range(start_date, periods=total_days)
+    hs, he = trip_days[0] - pd.DateOffset(years=1), trip_days[-1] - pd.DateOffset(years=1)
+
+    # 다년 기후값 (디스크에 없는 도시만 WEATHER_BATCH_SIZE 개씩 묶음 요청), 국가별 공휴일, 장소 데이터를 함께 받는다
+    coords = [(c['lat'], c['lon']) for c in cities]
+    calls = {("climate", j): (CLIMATE_STORE.get_many, tuple(coords[j:j + WEATHER_BATCH_SIZE])) for j in range(0, len(coords), WEATHER_BATCH_SIZE)}
+    calls.update({("holidays", cc): (HOLIDAY_STORE.between, cc, trip_days[0], trip_days[-1]) for cc in {c['country_code'] for c in cities} | {"KR"}})
+    calls["poi"] = (POI_STORE.ensure, coords)
+    fetched, failed = fetch_concurrently(calls)
+    climate = [series for j in range(0, len(coords), WEATHER_BATCH_SIZE)
+               for series in (fetched[("climate", j)] or [None] * len(coords[j:j + WEATHER_BATCH_SIZE]))]
+    # 기후값은 연중 일자(2/29 포함)로 조회되므로 여행 날짜 그대로 프레임을 만든다
+    frames = {i: create_base_dataframe(None, trip_days[0], trip_days[-1], series) for i, series in enumerate(climate) if series is not None}
+    # 기후값이 없는 도시는 작년 날씨를 묶음 요청으로 받아 같은 연중 일자의 여행 날짜로 옮긴다
+    fallback = [i for i in range(len(cities)) if i not in frames]
+    if fallback:
+        windows = [(hs, he)] * len(fallback)
+        res, _ = fetch_concurrently(route_weather_calls([cities[i] for i in fallback], windows))
+        for i, w in zip(fallback, split_route_weather(res, windows)): frames[i] = align_to_dates(create_base_dataframe(w, hs, he), trip_days)
+
+    # 도시 x 여행일 점수 행렬 (데이터가 없는 날은 0점)
+    scores = np.zeros((len(cities), total_days))
+    temps = np.full((len(cities), total_days), np.nan)
+    # 공휴일은 위에서 받은 국가별 배열로 마스크를 만든다 (받지 못한 국가는 휴일 없이 계산)
+    day_values = trip_days.values.astype("datetime64[D]")
+    countries = {key[1] for key in calls if key[0] == "holidays"}
+    masks = {cc: np.isin(day_values, fetched[("holidays", cc)]) if ("holidays", cc) not in failed else np.zeros(total_days, dtype=bool) for cc in countries}
+    holidays_ok = not any(key[0] == "holidays" for key in failed)
+    for i, df in frames.items():
+        if df.empty: continue
+        df = calculate_daily_score(df, masks[cities[i]['country_code']], masks["KR"], priority_mode)
+        scores[i] = df['total_score'].fillna(0).to_numpy()
+        temps[i] = df['temperature_2m_max'].to_numpy()
+    warnings = []
+    missing = sum(1 for i in range(len(cities)) if frames[i].empty)
+    if missing: warnings.append(f"⚠️ {missing}개 도시의 날씨 데이터를 불러오지 못해 날씨 점수 없이 배치했습니다.")
+    if not holidays_ok: warnings.append("⚠️ 공휴일 정보를 일부 불러오지 못해 휴일 없이 계산합니다.")
+    poi_ok = "poi" not in failed and not fetched["poi"]
+    if not poi_ok: warnings.append("⚠️ 일부 도시의 장소 데이터를 불러오지 못했습니다.")
+
+    # 거리 최적 루트(최근접 이웃 + 2-opt/Or-opt)를 기준으로 두고, 날씨 점수까지 반영한 순서·체류 일수를 찾는다
+    lats, lons = [c['lat'] for c in cities], [c['lon'] for c in cities]
+    t0 = time.perf_counter()
+    opt = optimize_route(lats, lons, start=start_idx, end=end_idx, round_trip=round_trip, time_budget=ROUTE_TIME_BUDGET)
+    try:
+        itin = plan_itinerary(scores, lats, lons, start_idx, end_idx, round_trip, *stay_range, seed_order=opt['order'],
+                              time_budget=max(0.0, ROUTE_TIME_BUDGET - (time.perf_counter() - t0)))
+    except ValueError as e:
+        return {"error": str(e), "complete": True}
+    opt = dict(opt, distance=itin['distance'], stages=opt['stages'] + [("날씨·체류 최적화", itin['distance'])])
+    route = [cities[i] for i in itin['order']]
+    dist_original = dict(opt['stages'])["입력 순서"]
+
+    stays, w_descs, day_scores, city_reports, offset = [], [], [], [], 0
+    pdf_lines = ["=== 세계일주 루트 ===", "", f"총 거리: {int(itin['distance']):,} km (입력 순서 {int(dist_original):,} km)",
+                 f"날씨 점수: {itin['score']:.0f}점 (균등 배분 {itin['even_score']:.0f}점)"]
+    for idx, (c, stay) in enumerate(zip(itin['order'], itin['stays'])):
+        arr = start_date + timedelta(offset)
+        dep = arr + timedelta(stay)
+        stays.append((stay, arr, dep))
+        t = np.nanmean(temps[c, offset:offset + stay]) if np.isfinite(temps[c, offset:offset + stay]).any() else None
+        w_desc = "데이터 없음" if t is None else f"{t:.1f}°C ({'쾌적' if 15<=t<=25 else '더움' if t>28 else '추움'})"
+        w_descs.append(w_desc)
+        day_scores.append(float(scores[c, offset:offset + stay].mean()))
+        offset += stay
+        simple_name = cities[c]['name'].split(',')[0]
+        pdf_lines.append(f"{idx+1}. {simple_name}: {arr}~{dep} ({stay}박) / {w_desc}")
+        city_reports.append((f"{idx+1}. {simple_name}", [f"도시: {cities[c]['name']}", f"일정: {arr}~{dep} ({stay}박)", f"날씨: {w_desc}", f"1일 평균 점수: {day_scores[-1]:.1f}", f"1일 예산: {daily_budget:,}원"]))
+    return {"opt": opt, "route": route, "stays": stays, "w_descs": w_descs, "day_scores": day_scores, "poi_ok": poi_ok, "warnings": warnings,
+            "itinerary": {k: itin[k] for k in ("score", "even_score", "limits")}, "stay_range": tuple(stay_range),
+            "pdf_lines": pdf_lines, "city_reports": city_reports, "complete": not missing and poi_ok and holidays_ok}
+
+def show_long_trip(plan, round_trip, total_weeks, daily_budget, travel_style, poi_theme):
+    if plan.get("error"): st.error(plan["error"]); return
+    opt, route, itin = plan["opt"], plan["route"], plan["itinerary"]
+    dist_original, dist_optimized = dict(opt['stages'])["입력 순서"], opt['distance']
+
+    # 절감 거리 및 비율
+    saved_km = dist_original - dist_optimized
+    saved_percent = (saved_km / dist_original * 100) if dist_original > 0 else 0
+
+    # --- 결과 화면 ---
+    st.divider()
+    st.subheader("📊 루트 효율성 분석")
+    
+    m1, m2, m3 = st.columns(3)
+    m1.metric("기존 총 거리", f"{int(dist_original):,} km")
+    m2.metric("최적화된 거리", f"{int(dist_optimized):,} km", delta=f"{-int(saved_km):+,} km", delta_color="inverse")
+    m3.metric("날씨 점수", f"{itin['score']:.0f}점", f"{itin['score'] - itin['even_score']:+.0f}점 (균등 배분 대비)")
+    st.caption(f"📏 입력 순서 대비 거리 {int(saved_percent)}% {'단축' if saved_km >= 0 else '증가'} · 도시별 체류 {itin['limits'][0]}~{itin['limits'][1]}박"
+               + (" (도시 수·기간에 맞춰 조정됨)" if tuple(itin['limits']) != plan["stay_range"] else ""))
+    stage_rows, prev_km = [], None
+    for stage, km in opt['stages']:
+        stage_rows.append({"단계": stage, "총 거리 (km)": int(km), "단계별 절감 (km)": int(prev_km - km) if prev_km is not None else 0})
+        prev_km = km
+    st.dataframe(pd.DataFrame(stage_rows), hide_index=True)
+
+    st.subheader(f"🗺️ 추천 루트 ({len(route)}도시{', 왕복' if round_trip else ''})")
+    draw_route_map(route, round_trip)
+    
+    total_cost = calculate_travel_cost(daily_budget, total_weeks*7, travel_style)
+    st.metric("총 예상 체류 경비 (항공권 제외)", f"약 {total_cost//10000}만 원")
+
+    st.write("---")
+    st.subheader("📅 상세 일정")
+    for w in plan["warnings"]: st.warning(w)
+    for idx, city in enumerate(route):
+        stay, arr, dep = plan["stays"][idx]
+        with st.container(border=True):
+            st.markdown(f"**{idx+1}. {city['name'].split(',')[0]}** ({stay}박)")
+            c1, c2, c3 = st.columns([2,2,1])
+            c1.write(f"{arr.strftime('%m/%d')}~{dep.strftime('%m/%d')}")
+            c2.write(f"🌡️ {plan['w_descs'][idx]} · ⭐ {plan['day_scores'][idx]:.1f}점/일")
+            c3.link_button("📍 지도", f"https://www.google.com/maps/search/?api=1&query={city['lat']},{city['lon']}")
+            with st.expander(f"🗺️ '{poi_theme}' 추천 장소"):
+                places = POI_STORE.query(city['lat'], city['lon'], poi_theme, top_n=5) if plan["poi_ok"] else None
+                if places is not None and not places.empty: st.dataframe(places, column_config={"지도 보기": st.column_config.LinkColumn("구글 지도", display_text="📍 지도")}, hide_index=True)
                 else: st.info("장소 데이터 없음")
-                
-                st.write("---")
-                st.subheader("🏆 Top 3 일정")
-                pdf_list = [f"도시: {city_data['name']}", f"테마: {theme}", ""]
-                for i, p in enumerate(top3):
-                    ps, pe = p['s'].strftime('%Y-%m-%d'), p['e'].strftime('%Y-%m-%d')
-                    tm, rn = p['win']['temperature_2m_max'].mean(), p['win']['precipitation_sum'].sum()
-                    fr = p['win']['is_free_day'].sum()
-                    co = calculate_travel_cost(budget, dur, style)
-                    tp = get_packing_tips(tm, rn)
-                    pdf_list.append(f"[{i+1}위] {ps}~{pe} / {tm:.1f}도 / {co:,}원")
-                    with st.expander(f"{['🥇','🥈','🥉'][i] if i<3 else ''} {i+1}위: {ps}~{pe}", expanded=(i==0)):
-                        c1, c2, c3, c4 = st.columns(4)
-                        c1.metric("기온", f"{tm:.1f}°C")
-                        c2.metric("강수", f"{rn:.1f}mm")
-                        c3.metric("휴일", f"{fr}일")
-                        c4.metric("경비", f"{co//10000}만 원")
-                        st.info(f"🧳 {tp}")
-                        st.link_button("✈️ 항공권 검색", get_flight_link(city_data['name']))
-                
-                p_bytes = create_pdf_report(f"Travel Plan: {city_data['name'].split(',')[0]}", pdf_list)
-                st.download_button("📄 PDF 다운로드", p_bytes, "Trip.pdf", "application/pdf")
-
-# 장기 여행: 엔터 추가, 입력창 초기화 + 거리 효율성 리포트 추가
+    download_buttons([
+        ("📥 PDF 다운로드", lazy_pdf_report(f"Long Trip ({total_weeks} Weeks)", plan["pdf_lines"]), "LongTrip.pdf"),
+        ("📚 도시별 상세 PDF", lazy_pdf_batch(plan["city_reports"]), "LongTrip_Cities.pdf"),
+    ])
+
+# 장기 여행: 자동완성 추가, 입력창 초기화 + 거리 효율성 리포트 추가
 def run_mode_long_trip():
     st.header("🌏 장기 여행 (루트 최적화)")
     if 'selected_cities_data' not in st.session_state: st.session_state['selected_cities_data'] = []
 
     # 콜백 함수: 도시 추가 및 입력창 초기화
+    def add_city(name):
+        found = None
+        with st.spinner("찾는 중..."):
+            found = search_city_coordinates(name)
+            if found:
+                if any(c['name'] == found['name'] for c in st.session_state['selected_cities_data']):
+                    st.toast("⚠️ 이미 추가된 도시입니다.")
+                else:
+                    st.session_state['selected_cities_data'].append(found)
+                    st.toast(f"✅ {found['name'].split(',')[0]} 추가 완료!")
+            else:
+                st.toast("❌ 도시를 찾을 수 없습니다.")
+        return found
+
     def handle_add_city():
         new_city = st.session_state.multi_input_key
         if new_city:
-            with st.spinner("찾는 중..."):
-                found = search_city_coordinates(new_city)
-                if found:
-                    if any(c['name'] == found['name'] for c in st.session_state['selected_cities_data']):
-                        st.toast("⚠️ 이미 추가된 도시입니다.")
-                    else:
-                        st.session_state['selected_cities_data'].append(found)
-                        st.toast(f"✅ {found['name'].split(',')[0]} 추가 완료!")
-                else:
-                    st.toast("❌ 도시를 찾을 수 없습니다.")
-            st.session_state.multi_input_key = "" 
-
-    c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
-    with c1: 
-        st.text_input("도시 검색 (예: 런던, 파리)", key="multi_input_key", on_change=handle_add_city)
-    with c2: 
-        st.button("추가 ➕", on_click=handle_add_city, use_container_width=True)
+            found = add_city(new_city)
+            st.session_state.multi_suggestions = city_suggestions(new_city, found)
+            st.session_state.multi_input_key = None
+
+    # 콜백 함수: 추천 후보 선택 시 바로 추가
+    def handle_pick_city():
+        pick = st.session_state.multi_pick
+        if pick:
+            add_city(pick)
+            st.session_state.multi_suggestions = []
+
+    city_input("도시 검색 (예: 런던, 파리)", "multi_input_key", handle_add_city)
+    if st.session_state.get("multi_suggestions"):
+        st.pills("🔎 혹시 이 도시인가요?", st.session_state.multi_suggestions, key="multi_pick", on_change=handle_pick_city)
     
     if st.session_state['selected_cities_data']:
         st.write("### 📋 선택 목록 (입력 순서)")
@@ -331,90 +671,30 @@ def run_mode_long_trip():
     st.write("---")
     if len(st.session_state['selected_cities_data']) > 0:
         start_city_name = st.selectbox("출발 도시", [c['name'] for c in st.session_state['selected_cities_data']])
-        start_city = next(c for c in st.session_state['selected_cities_data'] if c['name'] == start_city_name)
+        c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+        with c2: round_trip = st.checkbox("출발지로 복귀 (왕복)")
+        with c1: end_city_name = st.selectbox("도착 도시", [END_FREE] + [c['name'] for c in st.session_state['selected_cities_data'] if c['name'] != start_city_name], disabled=round_trip)
     
     col1, col2 = st.columns(2)
     with col1: start_date = st.date_input("시작일", value=datetime.now().date()+timedelta(30))
     with col2: total_weeks = st.slider("기간 (주)", 1, 24, 4)
     daily_budget = st.number_input("1일 예산 (원)", 150000)
+    c1, c2 = st.columns(2)
+    with c1: priority_mode = st.radio("우선순위", PRIORITY_MODES, horizontal=True)
+    with c2: stay_range = st.slider("도시별 체류 (박)", 1, 30, STAY_RANGE)
+    poi_theme = st.selectbox("도시별 추천 장소 테마", options=THEME_OSM_MAP.keys())
     travel_style = st.radio("스타일", ["절약", "일반", "럭셔리"], horizontal=True)
 
+    # 계획에 영향을 주는 입력이 그대로면 저장된 결과를 다시 그린다 (테마·스타일 변경은 화면만 갱신)
+    cities = st.session_state['selected_cities_data']
+    key = input_key("long", cities, start_city_name, end_city_name, round_trip, start_date, total_weeks, daily_budget, priority_mode, stay_range)
+    plan = recall_result(key)
     if st.button("🚀 루트 최적화", type="primary"):
-        cities = st.session_state['selected_cities_data']
-        if len(cities) < 2: st.warning("2개 이상 필요"); st.stop()
-
-        # 1. 원래 순서 (사용자가 입력한 순서 + 출발지 고려)
-        original_route = [start_city] + [c for c in cities if c['name'] != start_city['name']]
-        
-        # 원래 거리 계산
-        dist_original = 0
-        for i in range(len(original_route)-1):
-            dist_original += calculate_distance(original_route[i]['lat'], original_route[i]['lon'], original_route[i+1]['lat'], original_route[i+1]['lon'])
-
-        # 2. 최적화 알고리즘 (Nearest Neighbor)
-        route = [start_city]
-        unvisited = [c for c in cities if c['name'] != start_city['name']]
-        curr = start_city
-        
-        while unvisited:
-            nearest = min(unvisited, key=lambda x: calculate_distance(curr['lat'], curr['lon'], x['lat'], x['lon']))
-            route.append(nearest)
-            unvisited.remove(nearest)
-            curr = nearest
-        
-        # 최적 거리 계산
-        dist_optimized = 0
-        for i in range(len(route)-1):
-            dist_optimized += calculate_distance(route[i]['lat'], route[i]['lon'], route[i+1]['lat'], route[i+1]['lon'])
-
-        # 절감 거리 및 비율
-        saved_km = dist_original - dist_optimized
-        saved_percent = (saved_km / dist_original * 100) if dist_original > 0 else 0
-
-        # --- 결과 화면 ---
-        st.divider()
-        st.subheader("📊 루트 효율성 분석")
-        
-        m1, m2, m3 = st.columns(3)
-        m1.metric("기존 총 거리", f"{int(dist_original):,} km")
-        m2.metric("최적화된 거리", f"{int(dist_optimized):,} km", delta=f"-{int(saved_km):,} km (절약)", delta_color="inverse")
-        m3.metric("예상 항공 비용 절감", "효율적 이동", f"약 {int(saved_percent)}% 단축")
-
-        st.subheader(f"🗺️ 추천 루트 ({len(route)}도시)")
-        draw_route_map(route)
-        
-        total_cost = calculate_travel_cost(daily_budget, total_weeks*7, travel_style)
-        st.metric("총 예상 체류 경비 (항공권 제외)", f"약 {total_cost//10000}만 원")
-
-        st.write("---")
-        st.subheader("📅 상세 일정")
-        curr_date = start_date
-        pdf_lines = ["=== 세계일주 루트 ===", "", f"총 거리: {int(dist_optimized):,} km (기존 대비 {int(saved_km):,} km 단축)"]
-        
-        days_per = max(2, (total_weeks*7) // len(route))
-        
-        for idx, city in enumerate(route):
-            stay = (start_date + timedelta(total_weeks*7) - curr_date).days if idx == len(route)-1 else days_per
-            arr, dep = curr_date, curr_date + timedelta(stay)
-            hs, he = arr - pd.DateOffset(years=1), dep - pd.DateOffset(years=1)
-            with st.spinner(f"{city['name'].split(',')[0]} 분석..."):
-                w = get_historical_weather(city['lat'], city['lon'], hs.strftime('%Y-%m-%d'), he.strftime('%Y-%m-%d'))
-                df = create_base_dataframe(w, hs, he)
-            w_desc = "데이터 없음"
-            if not df.empty:
-                t = df['temperature_2m_max'].mean()
-                w_desc = f"{t:.1f}°C ({'쾌적' if 15<=t<=25 else '더움' if t>28 else '추움'})"
-            simple_name = city['name'].split(',')[0]
-            pdf_lines.append(f"{idx+1}. {simple_name}: {arr}~{dep} ({stay}박) / {w_desc}")
-            with st.container(border=True):
-                st.markdown(f"**{idx+1}. {simple_name}** ({stay}박)")
-                c1, c2, c3 = st.columns([2,2,1])
-                c1.write(f"{arr.strftime('%m/%d')}~{dep.strftime('%m/%d')}")
-                c2.write(f"🌡️ {w_desc}")
-                c3.link_button("📍 지도", f"https://www.google.com/maps/search/?api=1&query={city['lat']},{city['lon']}")
-            curr_date = dep
-        p_bytes = create_pdf_report(f"Long Trip ({total_weeks} Weeks)", pdf_lines)
-        st.download_button("📥 PDF 다운로드", p_bytes, "LongTrip.pdf", "application/pdf")
+        if len(cities) < 2: st.warning("2개 이상 필요"); return
+        if plan is None or not plan["complete"]:
+            with st.spinner(f"{len(cities)}개 도시 루트·날씨·장소 분석..."):
+                plan = remember_result(key, plan_long_trip(cities, start_city_name, end_city_name, round_trip, start_date, total_weeks, daily_budget, priority_mode, stay_range))
+    if plan is not None: show_long_trip(plan, round_trip, total_weeks, daily_budget, travel_style, poi_theme)
 
 def run_mode_chat():
     st.header("🤖 AI Travel Consultant")
@@ -425,31 +705,40 @@ def run_mode_chat():
         st.session_state.messages.append({"role": "user", "content": prompt})
         st.chat_message("user").markdown(prompt)
         with st.chat_message("assistant"):
-            with st.spinner("생각 중..."):
-                curr_date = datetime.now().strftime("%Y-%m-%d")
-                candidates = ["gemini-2.0-flash", "gemini-2.5-flash", "gemini-1.5-flash", "gemini-pro"]
-                success = False
-                for model in candidates:
-                    try:
-                        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={GEMINI_KEY}"
-                        headers = {'Content-Type': 'application/json'}
-                        data = {"contents": [{"parts": [{"text": f"System: Today is {curr_date}. Use search for latest info. Do not write code.\nUser: {prompt}"}]}], "tools": [{"googleSearchRetrieval": {}}]}
-                        resp = requests.post(url, headers=headers, json=data)
-                        if resp.status_code == 200:
-                            ai_msg = resp.json()['candidates'][0]['content']['parts'][0]['text']
-                            st.markdown(ai_msg)
-                            st.session_state.messages.append({"role": "assistant", "content": ai_msg})
-                            success = True; break
-                        else:
-                            del data['tools']
-                            resp = requests.post(url, headers=headers, json=data)
-                            if resp.status_code == 200:
-                                ai_msg = resp.json()['candidates'][0]['content']['parts'][0]['text']
-                                st.markdown(ai_msg); st.caption("ℹ️ 검색 없이 답변")
-                                st.session_state.messages.append({"role": "assistant", "content": ai_msg})
-                                success = True; break
-                    except: continue
-                if not success: st.error("AI 연결 실패")
+            stats = {}
+            ai_msg = st.write_stream(stream_reply(GEMINI_KEY, st.session_state.messages, stats))
+            if stats["ok"]:
+                if not stats["tools"]: st.caption("ℹ️ 검색 없이 답변")
+                st.session_state.messages.append({"role": "assistant", "content": ai_msg})
+            elif stats.get("reply_chars"): st.error("AI 응답이 중간에 끊겼습니다. 다시 질문해 주세요.")
+            else: st.error("AI 연결 실패")
+        st.session_state.setdefault("chat_stats", []).append(stats)
+    if st.session_state.get("chat_stats"):
+        with st.expander("📈 응답 통계"):
+            st.dataframe(pd.DataFrame(st.session_state.chat_stats), hide_index=True)
+
+# 도시 랭킹: 여러 도시의 최적 기간을 한 번에 비교
+def run_mode_leaderboard():
+    st.header("🏆 어디로 갈까? 도시 랭킹")
+    with st.form("ranking"):
+        gazetteer = load_gazetteer()
+        names = st.multiselect("비교할 도시 (비우면 전체)", gazetteer.names)
+        c1, c2 = st.columns(2)
+        with c1: mode = st.radio("우선순위", PRIORITY_MODES, horizontal=True)
+        with c2: dur = st.slider("여행 기간 (박)", MIN_NIGHTS, MAX_NIGHTS, 5)
+        today = datetime.now().date()
+        dates = st.date_input("기간", value=(today+timedelta(30), today+timedelta(90)), min_value=today, max_value=today+timedelta(365))
+        submit = st.form_submit_button("🚀 랭킹 계산")
+    if submit:
+        if len(dates) < 2: st.error("기간을 선택하세요."); return
+        cities = select_cities(gazetteer, names)
+        with st.spinner(f"{len(cities)}개 도시 분석 중..."):
+            board = build_leaderboard(cities, dates[0], dates[1], dur, mode, CALENDARIFIC_KEY)
+        if board.empty: st.error("데이터 부족"); return
+        if len(board) < len(cities): st.warning(f"⚠️ {len(cities) - len(board)}개 도시는 날씨 데이터를 불러오지 못해 제외했습니다.")
+        missing = missing_holidays(board)
+        if missing: st.warning(f"⚠️ 공휴일 정보를 불러오지 못해 휴일 없이 계산한 도시: {', '.join(missing)}")
+        st.dataframe(board, use_container_width=True)
 
 # --- 메인 실행 ---
 def main():
@@ -457,18 +746,37 @@ def main():
     check_api_keys()
     with st.sidebar:
         st.title("✈️ 메뉴")
-        app_mode = st.radio("모드 선택", ["Short-Term", "Long-Term", "AI Travel Consultant"])
+        app_mode = st.radio("모드 선택", ["Short-Term", "Long-Term", "City Ranking", "AI Travel Consultant"])
         st.write("---")
-        st.subheader("💸 환율 계산기")
-        rates = get_exchange_rates()
-        if rates:
-            amt = st.number_input("KRW 입력", 10000, step=1000)
-            curr = st.selectbox("통화", ["USD", "JPY", "EUR", "CNY"])
-            st.metric(f"{curr} 환산", f"{amt * rates.get(curr, 0):,.2f}")
+        rates_slot = st.container()  # 환율 계산기는 본문을 그린 뒤에 채운다
+        with st.expander("📡 API 호출 통계"):
+            stats = http_client.client.stats()
+            if stats: st.dataframe(pd.DataFrame(stats).T)
+            else: st.caption("아직 호출 기록이 없습니다.")
+        with st.expander("🔁 요청 병합 통계"):
+            sf_stats = singleflight.group.stats()
+            if sf_stats: st.dataframe(pd.DataFrame(sf_stats).T)
+            else: st.caption("아직 호출 기록이 없습니다.")
+        with st.expander("💾 디스크 캐시 통계"):
+            try: cache_stats = get_cache().stats()
+            except Exception: cache_stats = {}
+            if cache_stats: st.dataframe(pd.DataFrame(cache_stats).T)
+            else: st.caption("캐시가 비어 있습니다.")
     
     if app_mode == "Short-Term": run_mode_single_trip()
     elif app_mode == "Long-Term": run_mode_long_trip()
+    elif app_mode == "City Ranking": run_mode_leaderboard()
     elif app_mode == "AI Travel Consultant": run_mode_chat()
+    with rates_slot: exchange_calculator()
+    # ?debug=1 로 열면 단계별 소요 시간 패널을 보여준다
+    if st.query_params.get("debug"):
+        with st.sidebar.expander("⏱️ 단계별 소요 시간", expanded=True):
+            span_stats = timing.recorder.summary()
+            if span_stats:
+                st.dataframe(pd.DataFrame(span_stats).T.sort_values("total_ms", ascending=False))
+                st.download_button("📤 JSON 내보내기", timing.recorder.to_json, "spans.json", "application/json", on_click="ignore")
+                if st.button("기록 지우기"): timing.recorder.clear(); st.rerun()
+            else: st.caption("아직 기록이 없습니다.")
 
 if __name__ == "__main__":
     main()
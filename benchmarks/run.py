@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stub_server import StubServer, add_latency_args, parse_route_latency
+
+# --- 파이프라인 벤치마크 ---
+# 스텁 서버를 띄우고 UI 없이 단기 여행 / 장기 여행 / AI 상담 파이프라인을 끝까지 실행하며
+# timing span (조회·점수·랭킹·루트·PDF) 을 반복 회차별로 모아 표와 JSON 으로 낸다.
+# 첫 회차는 빈 캐시(콜드), 이후 회차는 캐시가 데워진 상태다. --cold 면 매 회차 캐시를 비운다.
+#   python benchmarks/run.py --latency-ms 80 --iterations 3 --cities 20 --weeks 8 --out spans.json
+PIPELINES = ("single", "long", "chat")
+
+def setup_environment(scratch):
+    # app 을 불러오기 전에: 빈 캐시 경로, 더미 키, 절대 경로 도시 데이터
+    os.environ["TRAVEL_CACHE_PATH"] = os.path.join(scratch, "upstream.sqlite")
+    os.environ["TRAVEL_CLIMATE_DIR"] = os.path.join(scratch, "climatology")
+    os.environ.setdefault("TRAVEL_CITY_DATA", os.path.join(ROOT, "city_coordinates.json"))
+    os.environ.setdefault("CALENDARIFIC_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_KEY", "benchmark")
+    os.chdir(scratch)  # 폰트 파일도 스텁에서 받아 여기에 저장
+
+def quiet_streamlit():
+    # bare mode 에서 호출마다 찍히는 "missing ScriptRunContext" 경고 끄기
+    from streamlit import config
+    from streamlit.logger import set_log_level
+    config.set_option("logger.level", "error")
+    set_log_level("error")
+
+def reset_caches(app, scratch):
+    import streamlit as st
+    st.cache_data.clear()
+    app.get_cache().clear()
+    shutil.rmtree(os.path.join(scratch, "climatology"), ignore_errors=True)
+    app.CLIMATE_STORE.loaded.clear()
+    app.HOLIDAY_STORE.years.clear()
+    app.POI_STORE.areas.clear()
+
+def run_single(app, args):
+    # 사이드바 환율 + 도시 검색 (가제티어에 없는 이름이면 Nominatim) + 분석 + PDF
+    app.get_exchange_rates()
+    city = app.search_city_coordinates(args.city)
+    theme = next(iter(app.THEME_OSM_MAP))
+    s = date.today() + timedelta(30)
+    result = app.analyze_single_trip(city, theme, s, s + timedelta(args.days), app.PRIORITY_MODES[0], args.nights, 200000, "일반")
+    if result.get("error"): raise RuntimeError(result["error"])
+    export_pdfs(app, f"Travel Plan: {city['name']}", result["pdf_list"], result["window_reports"])
+    return {"complete": result["complete"], "top": len(result["top3"])}
+
+def run_long(app, args):
+    records = app.load_gazetteer().records[:args.cities]
+    cities = [{"name": c['name'], "lat": c['lat'], "lon": c['lon'], "country_code": c['code']} for c in records]
+    plan = app.plan_long_trip(cities, cities[0]['name'], app.END_FREE, False, date.today() + timedelta(30), args.weeks, 150000)
+    export_pdfs(app, f"Long Trip ({args.weeks} Weeks)", plan["pdf_lines"], plan["city_reports"])
+    return {"complete": plan["complete"], "cities": len(plan["route"]), "km": round(plan["opt"]["distance"])}
+
+def run_chat(app, args):
+    stats, messages = {}, [{"role": "user", "content": "11월에 도쿄 날씨 어때?"}]
+    with app.timing.span("fetch.gemini"):
+        reply = "".join(app.stream_reply(app.GEMINI_KEY, messages, stats))
+    if not stats["ok"]: raise RuntimeError("gemini stub failed")
+    return {"chars": len(reply), "first_token_ms": stats.get("first_token_ms")}
+
+def export_pdfs(app, title, lines, reports):
+    # 폰트가 없으면 (스텁에 --font 를 주지 않은 경우) PDF 단계는 건너뛴다
+    from report import create_pdf_batch, create_pdf_report, download_korean_font
+    try: download_korean_font()
+    except Exception: return
+    create_pdf_report(title, lines)
+    create_pdf_batch(reports)
+
+RUNNERS = {"single": run_single, "long": run_long, "chat": run_chat}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="스텁 업스트림으로 파이프라인 벤치마크")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help=f"쉼표 구분 ({', '.join(PIPELINES)})")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--cold", action="store_true", help="매 회차 모든 캐시를 비운다")
+    parser.add_argument("--city", default="도쿄", help="단기 여행 도시 (가제티어에 없으면 Nominatim 스텁으로 검색)")
+    parser.add_argument("--days", type=int, default=60, help="단기 여행 검색 기간 (일)")
+    parser.add_argument("--nights", type=int, default=5)
+    parser.add_argument("--cities", type=int, default=12, help="장기 여행 도시 수 (가제티어 앞에서부터)")
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--out", default="", help="span 과 요약을 저장할 JSON 경로")
+    add_latency_args(parser)
+    args = parser.parse_args(argv)
+    out_path = os.path.abspath(args.out) if args.out else ""
+
+    scratch = tempfile.mkdtemp(prefix="travel-bench-")
+    setup_environment(scratch)
+    stub = StubServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, route_latency=parse_route_latency(args.latency),
+                      font_path=os.path.abspath(os.path.join(ROOT, args.font)) if args.font else None).start()
+    os.environ["TRAVEL_UPSTREAM_URL"] = stub.url  # app 을 불러오는 순간 환율 조회가 시작되므로 그 전에
+    quiet_streamlit()
+    import app  # Streamlit 런타임 없이 (bare mode) 불러온다
+
+    runs, all_spans, failed = [], [], False
+    for i in range(args.iterations):
+        if args.cold and i: reset_caches(app, scratch)
+        for name in [p.strip() for p in args.pipelines.split(",") if p.strip()]:
+            app.timing.recorder.clear()
+            t0, info, error = time.perf_counter(), {}, None
+            try:
+                with app.timing.span(f"pipeline.{name}"):
+                    info = RUNNERS[name](app, args)
+            except Exception as e:
+                error, failed = f"{type(e).__name__}: {e}", True
+            wall = (time.perf_counter() - t0) * 1000
+            spans = app.timing.recorder.spans()
+            all_spans += [dict(s, iteration=i, pipeline=name) for s in spans]
+            runs.append({"iteration": i, "pipeline": name, "wall_ms": round(wall, 1), "info": info, "error": error, "summary": app.timing.recorder.summary()})
+            print(f"[{i}] {name:<7}{wall:9.1f} ms  {error or info}")
+            for span_name, row in sorted(runs[-1]["summary"].items(), key=lambda kv: -kv[1]["total_ms"]):
+                print(f"      {span_name:<22}{row['count']:>5} x {row['avg_ms']:9.2f} ms  (max {row['max_ms']:.2f})")
+    stub.stop()
+    report = {"config": {k: v for k, v in vars(args).items() if k != "out"}, "requests": stub.counts, "http": app.http_client.client.stats(),
+              "runs": runs, "spans": all_spans}
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f: json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"saved {out_path}")
+    shutil.rmtree(scratch, ignore_errors=True)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
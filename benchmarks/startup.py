@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# --- 앱 시작 시간 측정 (회귀 방지용) ---
+# 새 프로세스에서 app.py 를 AppTest 로 처음 그리는 시간과 모드별 재실행 시간을 재고,
+# 특정 모드에서만 필요한 무거운 패키지가 첫 화면에서 불러와졌는지 확인한다. 기준을 넘으면 종료 코드 1.
+# 업스트림은 로컬 스텁 서버(stub_server.py)가 대신해 네트워크 상태와 무관하게 잰다.
+#   python benchmarks/startup.py --budget-ms 3000
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from stub_server import StubServer
+APP_PATH = os.path.join(ROOT, "app.py")
+MODES = ["Short-Term", "Long-Term", "City Ranking", "AI Travel Consultant"]
+# 첫 화면(단기 여행)에서 불러오면 안 되는 모듈: 루트 지도 / 히트맵 / PDF 내보내기 전용
+LAZY_MODULES = ("pydeck", "altair", "fpdf")
+
+def measure():
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    t1 = time.perf_counter()
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.secrets["calendarific_key"], at.secrets["gemini_key"] = "benchmark", "benchmark"
+    at.run()
+    t2 = time.perf_counter()
+    loaded = [m for m in LAZY_MODULES if m in sys.modules]
+    timings = {"import_streamlit_ms": (t1 - t0) * 1000, "first_render_ms": (t2 - t1) * 1000}
+    for mode in MODES:
+        t = time.perf_counter()
+        at.sidebar.radio[0].set_value(mode).run()
+        timings[f"rerun_{mode}_ms"] = (time.perf_counter() - t) * 1000
+    errors = [e.value for e in at.exception]
+    return timings, loaded, errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="앱 콜드 스타트 측정")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="스텁 업스트림 응답 지연 (ms)")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("STARTUP_BUDGET_MS", 3000)), help="첫 화면 허용 시간 (ms)")
+    args = parser.parse_args(argv)
+
+    # 캐시가 비어 있는 새 레플리카와 같은 조건
+    scratch = tempfile.mkdtemp(prefix="travel-startup-")
+    os.environ["TRAVEL_CACHE_PATH"] = os.path.join(scratch, "upstream.sqlite")
+    os.environ["TRAVEL_CLIMATE_DIR"] = os.path.join(scratch, "climatology")
+    os.chdir(ROOT)
+    stub = StubServer(latency_ms=args.latency_ms).start()
+    os.environ["TRAVEL_UPSTREAM_URL"] = stub.url
+
+    timings, loaded, errors = measure()
+    stub.stop()
+    for name, ms in timings.items(): print(f"{name:<36}{ms:9.1f}")
+    failures = []
+    if timings["first_render_ms"] > args.budget_ms: failures.append(f"first render {timings['first_render_ms']:.0f} ms > budget {args.budget_ms:.0f} ms")
+    if loaded: failures.append(f"loaded on first render: {', '.join(loaded)}")
+    if errors: failures.append(f"app raised: {errors}")
+    for f in failures: print("FAIL:", f)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# --- 업스트림 스텁 서버 ---
+# Open-Meteo / Calendarific / Nominatim / Overpass / 환율 / Gemini 응답을 실제와 같은 모양으로 돌려주는 로컬 서버.
+# 응답은 요청 인자(좌표·날짜·국가 등)에서 결정적으로 만들어지므로 같은 요청에는 항상 같은 응답이 나온다.
+# http_client 의 TRAVEL_UPSTREAM_URL (또는 client.upstream) 을 이 서버 주소로 두면 앱 전체가 여기로 요청한다.
+#   python benchmarks/stub_server.py --port 8765 --latency-ms 80 --latency overpass=600
+ROUTES = ("archive", "holidays", "geocode", "overpass", "rates", "gemini", "font")
+RATES = {"KRW": 1.0, "USD": 0.00072, "JPY": 0.108, "EUR": 0.00066, "CNY": 0.0052, "GBP": 0.00056}
+OVERPASS_AROUND = re.compile(r'(node|way)\[([^\]]+)\]\["name"\]\(around:(\d+),\s*([-\d.]+),\s*([-\d.]+)\)')
+POIS_PER_TAG = 12
+GEMINI_REPLY = "스텁 응답입니다. 여행 일정은 날씨와 공휴일을 고려해 정하세요. 즐거운 여행 되세요!"
+
+def _seed(*parts):
+    return int.from_bytes(hashlib.sha256(repr(parts).encode()).digest()[:8], "big")
+
+def archive_location(lat, lon, start, end):
+    # 위도에 따른 계절 곡선 + 결정적 잡음으로 일별 최고기온/강수량 생성
+    rng = random.Random(_seed("archive", round(lat, 2), round(lon, 2)))
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    days = [first + timedelta(i) for i in range((last - first).days + 1)]
+    base, swing = 28 - abs(lat) * 0.35, min(abs(lat) * 0.4, 18) * (1 if lat >= 0 else -1)
+    temps = [round(base + swing * math.cos(2 * math.pi * (d.timetuple().tm_yday - 200) / 365.25) + rng.gauss(0, 2.5), 1) for d in days]
+    rain = [round(rng.expovariate(1 / 6), 1) if rng.random() < 0.3 else 0.0 for _ in days]
+    return {"latitude": lat, "longitude": lon, "timezone": "GMT", "daily_units": {"time": "iso8601", "temperature_2m_max": "°C", "precipitation_sum": "mm"},
+            "daily": {"time": [d.isoformat() for d in days], "temperature_2m_max": temps, "precipitation_sum": rain}}
+
+def archive(query):
+    lats = [float(v) for v in query["latitude"][0].split(",")]
+    lons = [float(v) for v in query["longitude"][0].split(",")]
+    locs = [archive_location(la, lo, query["start_date"][0], query["end_date"][0]) for la, lo in zip(lats, lons)]
+    return locs if len(locs) > 1 else locs[0]
+
+def holidays(query):
+    country, year = query["country"][0].upper(), int(query["year"][0])
+    rng = random.Random(_seed("holidays", country, year))
+    days = {date(year, 1, 1)} | {date(year, 1, 1) + timedelta(rng.randrange(365)) for _ in range(12)}
+    return {"meta": {"code": 200}, "response": {"holidays": [
+        {"name": f"Holiday {i + 1}", "country": {"id": country.lower()}, "date": {"iso": d.isoformat()}} for i, d in enumerate(sorted(days))]}}
+
+def geocode(query):
+    q = query.get("q", [""])[0]
+    rng = random.Random(_seed("geocode", q))
+    return [{"display_name": f"{q}, Stubland", "lat": f"{rng.uniform(-50, 60):.4f}", "lon": f"{rng.uniform(-170, 170):.4f}",
+             "address": {"country_code": "jp"}}]
+
+def overpass(body):
+    # union 쿼리의 around 구문마다 반경 안에 장소 POIS_PER_TAG 개 (way 는 center 로)
+    data = parse_qs(body).get("data", [""])[0]
+    elements = []
+    for kind, tag, radius, lat, lon in OVERPASS_AROUND.findall(data):
+        key, value = (s.strip().strip('"') for s in tag.split("=", 1))
+        rng = random.Random(_seed("overpass", kind, tag, lat, lon))
+        for i in range(POIS_PER_TAG):
+            dist, bearing = rng.uniform(0, int(radius) * 0.9), rng.uniform(0, 2 * math.pi)
+            plat = float(lat) + dist * math.cos(bearing) / 111320
+            plon = float(lon) + dist * math.sin(bearing) / (111320 * max(math.cos(math.radians(float(lat))), 1e-6))
+            el = {"type": kind, "id": _seed(kind, tag, lat, lon, i) % 10 ** 10, "tags": {key: value, "name": f"{value.title()} {i + 1}"}}
+            if kind == "node": el.update(lat=plat, lon=plon)
+            else: el["center"] = {"lat": plat, "lon": plon}
+            elements.append(el)
+    return {"version": 0.6, "generator": "stub", "elements": elements}
+
+def rates(base):
+    scale = 1 / RATES.get(base, 1.0)
+    return {"result": "success", "base_code": base, "rates": {c: round(v * scale, 8) for c, v in RATES.items()}}
+
+def gemini_chunks(text=GEMINI_REPLY, parts=6):
+    step = math.ceil(len(text) / parts)
+    pieces = [text[i:i + step] for i in range(0, len(text), step)]
+    for i, piece in enumerate(pieces):
+        chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+        if i == len(pieces) - 1:
+            chunk["usageMetadata"] = {"promptTokenCount": 120, "candidatesTokenCount": len(text) // 2}
+        yield chunk
+
+def route_of(path):
+    if path.endswith("/v1/archive"): return "archive"
+    if path.endswith("/api/v2/holidays"): return "holidays"
+    if path.endswith("/search"): return "geocode"
+    if path.endswith("/api/interpreter"): return "overpass"
+    if "/v6/latest/" in path: return "rates"
+    if ":streamGenerateContent" in path: return "gemini"
+    if path.endswith(".ttf"): return "font"
+    return None
+
+class StubServer:
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0, route_latency=None, font_path=None):
+        # route_latency: {경로 이름: ms} 로 특정 업스트림만 느리게
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.route_latency = dict(route_latency or {})
+        self.font_path = font_path
+        self.counts = {r: 0 for r in ROUTES}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self, route):
+        ms = self.route_latency.get(route, self.latency_ms)
+        if self.jitter_ms: ms += random.uniform(0, self.jitter_ms)
+        if ms > 0: time.sleep(ms / 1000)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, payload):
+                self._send(200, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+            def _dispatch(self, body=""):
+                parts = urlsplit(self.path)
+                route, query = route_of(parts.path), parse_qs(parts.query)
+                if route is None: return self._send(404, b'{"error": "unknown route"}')
+                with server.lock: server.counts[route] += 1
+                server.delay(route)
+                if route == "archive": return self._json(archive(query))
+                if route == "holidays": return self._json(holidays(query))
+                if route == "geocode": return self._json(geocode(query))
+                if route == "overpass": return self._json(overpass(body))
+                if route == "rates": return self._json(rates(parts.path.rsplit("/", 1)[-1].upper()))
+                if route == "font":
+                    if not server.font_path or not os.path.exists(server.font_path): return self._send(404, b"")
+                    with open(server.font_path, "rb") as f: return self._send(200, f.read(), "font/ttf")
+                # Gemini: SSE 스트림, 조각마다 연결을 유지한 채 흘려보낸다
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for chunk in gemini_chunks():
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\r\n\r\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.close_connection = True
+
+            def do_GET(self):
+                self._dispatch()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self._dispatch(self.rfile.read(length).decode("utf-8") if length else "")
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="stub-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def parse_route_latency(items):
+    # ["overpass=600", "gemini=200"] -> {"overpass": 600.0, "gemini": 200.0}
+    out = {}
+    for item in items or []:
+        name, ms = item.split("=", 1)
+        if name not in ROUTES: raise argparse.ArgumentTypeError(f"unknown route: {name} (choose from {', '.join(ROUTES)})")
+        out[name] = float(ms)
+    return out
+
+def add_latency_args(parser):
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="모든 응답 앞에 넣을 지연 (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="0~jitter 사이 무작위 추가 지연 (ms)")
+    parser.add_argument("--latency", action="append", metavar="ROUTE=MS", help=f"경로별 지연 ({', '.join(ROUTES)})")
+    parser.add_argument("--font", default=None, help="폰트 요청에 돌려줄 .ttf 파일")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="업스트림 API 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_latency_args(parser)
+    args = parser.parse_args(argv)
+    server = StubServer(args.host, args.port, args.latency_ms, args.jitter_ms, parse_route_latency(args.latency), args.font)
+    print(f"stub upstream on {server.url}  (TRAVEL_UPSTREAM_URL={server.url})")
+    try: server.httpd.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import os
+import tempfile
+import threading
+import warnings
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import http_client
+from singleflight import group as single_flight_group
+from timing import timed
+
+# --- 다년 기후값 저장소 ---
+# 도시별로 최근 N년치 일별 최고기온/강수량을 한 번의 archive 요청으로 받아
+# (변수, 연도, 연중 일자 366칸) float32 배열로 저장하고 np.load(mmap_mode="r") 로 연다.
+# 이후 어떤 기간 조회든 인덱스 연산만으로 다년 평균·표준편차를 돌려준다.
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+CLIMATE_DIR = os.environ.get("TRAVEL_CLIMATE_DIR", os.path.join(".cache", "climatology"))
+CLIMATE_YEARS = 5
+VARIABLES = ("temperature_2m_max", "precipitation_sum")
+# 윤년 기준 월 시작 칸 (2/29 는 59번 칸, 평년에는 비어 있음)
+MONTH_OFFSETS = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
+def day_slots(dates):
+    idx = pd.DatetimeIndex(dates)
+    return MONTH_OFFSETS[idx.month - 1] + idx.day - 1
+
+def city_key(lat, lon):
+    return f"{round(float(lat), 2):+.2f}_{round(float(lon), 2):+.2f}"
+
+def climate_years(n=CLIMATE_YEARS, today=None):
+    # 완결된 최근 n개 연도
+    last = (today or date.today()).year - 1
+    return list(range(last - n + 1, last + 1))
+
+STAT_COLUMNS = [c for name in VARIABLES for c in (name, f"{name}_std")] + ["climate_years"]
+
+class ClimateSeries:
+    def __init__(self, values, years):
+        # values: (변수, 연도, 366) 배열 (memmap 가능)
+        self.values, self.years = values, list(years)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # 2/29 처럼 값이 하나도 없는 칸
+            mean, std = np.nanmean(values, axis=1), np.nanstd(values, axis=1)
+        count = np.sum(~np.isnan(values), axis=1)
+        # (366, 통계 컬럼) 표 하나로 묶어 두면 조회는 인덱싱 한 번
+        self.table = np.column_stack([col for v in range(len(VARIABLES)) for col in (mean[v], std[v])] + [count[0]])
+
+    def lookup(self, dates):
+        # 날짜 배열 -> (날짜 수, 통계 컬럼) 배열
+        return self.table[day_slots(dates)]
+
+    def frame(self, start_date, end_date):
+        # start~end 각 날짜의 다년 평균/표준편차 (create_base_dataframe 과 같은 컬럼 + 통계 컬럼)
+        dates = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), name="date")
+        return pd.DataFrame(self.lookup(dates), index=dates, columns=STAT_COLUMNS)
+
+class ClimateStore:
+    def __init__(self, directory=CLIMATE_DIR, n_years=CLIMATE_YEARS):
+        self.directory, self.n_years = directory, n_years
+        self.loaded = {}
+        self.lock = threading.Lock()
+
+    def _path(self, key, years):
+        return os.path.join(self.directory, f"{key}_{years[0]}-{years[-1]}.npy")
+
+    @timed("fetch.climatology")
+    def ingest(self, lat, lon, years):
+        # 전체 기간을 한 번에 받아 (변수, 연도, 366) 배열로 정리
+        params = {"latitude": lat, "longitude": lon, "start_date": f"{years[0]}-01-01", "end_date": f"{years[-1]}-12-31",
+                  "daily": ",".join(VARIABLES), "timezone": "auto"}
+        res = http_client.get(ARCHIVE_URL, params=params, timeout=(5, 60))
+        res.raise_for_status()
+        return self.from_daily(res.json()["daily"], years)
+
+    @timed("fetch.climatology_batch")
+    def ingest_many(self, coords, years):
+        # 여러 좌표를 쉼표로 이어 archive 요청 하나로 받는다 (응답은 좌표 순서대로의 위치별 리스트)
+        params = {"latitude": ",".join(str(la) for la, _ in coords), "longitude": ",".join(str(lo) for _, lo in coords),
+                  "start_date": f"{years[0]}-01-01", "end_date": f"{years[-1]}-12-31", "daily": ",".join(VARIABLES), "timezone": "auto"}
+        res = http_client.get(ARCHIVE_URL, params=params, timeout=(5, 120))
+        res.raise_for_status()
+        data = res.json()
+        return [self.from_daily(loc["daily"], years) for loc in (data if isinstance(data, list) else [data])]
+
+    @staticmethod
+    def from_daily(daily, years):
+        dates = pd.DatetimeIndex(pd.to_datetime(daily["time"]))
+        out = np.full((len(VARIABLES), len(years), 366), np.nan, dtype=np.float32)
+        keep = np.isin(dates.year, years)
+        rows = np.searchsorted(years, dates.year[keep])
+        slots = day_slots(dates[keep])
+        for v, name in enumerate(VARIABLES):
+            out[v, rows, slots] = np.asarray(daily[name], dtype=np.float32)[keep]
+        return out
+
+    def _save(self, path, values):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp, path)
+
+    def get(self, lat, lon):
+        # 도시의 ClimateSeries (디스크에 없으면 한 번 받아 저장). 실패하면 None
+        key, years = city_key(lat, lon), climate_years(self.n_years)
+        path = self._path(key, years)
+        with self.lock:
+            if path in self.loaded: return self.loaded[path]
+        # 같은 도시를 동시에 요청하면 수집은 한 번만
+        return single_flight_group.do("climatology", path, self._load, path, lat, lon, years)
+
+    def get_many(self, coords):
+        # 여러 도시의 ClimateSeries 목록 (좌표 순서대로, 실패한 도시는 None)
+        # 디스크에 없는 도시들만 모아 한 번의 요청으로 받는다 (묶음 크기는 호출하는 쪽에서 나눈다)
+        years = climate_years(self.n_years)
+        paths = [self._path(city_key(la, lo), years) for la, lo in coords]
+        with self.lock:
+            out = [self.loaded.get(p) for p in paths]
+        todo = [i for i, p in enumerate(paths) if out[i] is None and not os.path.exists(p)]
+        if todo:
+            todo_paths = tuple(dict.fromkeys(paths[i] for i in todo))
+            first = {p: coords[paths.index(p)] for p in todo_paths}
+            single_flight_group.do("climatology", todo_paths, self._ingest_batch, first, years)
+        return [out[i] if out[i] is not None else self._open(paths[i], years) for i in range(len(coords))]
+
+    def _ingest_batch(self, targets, years):
+        # targets: {저장 경로: (lat, lon)}
+        try: values = self.ingest_many(list(targets.values()), years)
+        except Exception: return False
+        for path, v in zip(targets, values): self._save(path, v)
+        return True
+
+    def _open(self, path, years):
+        if not os.path.exists(path): return None
+        try: series = ClimateSeries(np.load(path, mmap_mode="r"), years)
+        except Exception: return None
+        with self.lock:
+            self.loaded[path] = series
+        return series
+
+    def _load(self, path, lat, lon, years):
+        try:
+            if not os.path.exists(path): self._save(path, self.ingest(lat, lon, years))
+        except Exception:
+            return None
+        return self._open(path, years)
@@ -0,0 +1,144 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+# --- 디스크 응답 캐시 (SQLite) ---
+# 프로세스/레플리카 간에 공유되는 업스트림 응답 캐시. 데이터 소스별 TTL + 용량 기반 LRU 제거.
+CACHE_PATH = os.environ.get("TRAVEL_CACHE_PATH", os.path.join(".cache", "upstream.sqlite"))
+MAX_BYTES = int(os.environ.get("TRAVEL_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+DAY = 24 * 3600
+# 데이터 소스별 TTL (초), None 이면 만료 없음
+SOURCE_TTL = {
+    "weather_archive": None,   # 과거 관측값은 변하지 않음
+    "holidays": 365 * DAY,
+    "exchange_rates": 3600,
+    "poi": DAY,
+    "geocode": 30 * DAY,
+}
+
+def _normalize(value):
+    # 같은 요청이 같은 키가 되도록 날짜/실수/컬렉션을 정규화
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value == datetime.combine(value.date(), datetime.min.time()) else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+def make_key(source, args, kwargs):
+    payload = json.dumps([source, _normalize(list(args)), _normalize(kwargs)], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class DiskCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        self.path, self.max_bytes = path, max_bytes
+        self.local = threading.local()
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, source TEXT, value BLOB, size INTEGER, created REAL, expires REAL, accessed REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (source TEXT PRIMARY KEY, hits INTEGER DEFAULT 0, misses INTEGER DEFAULT 0)")
+
+    def _conn(self):
+        # sqlite 커넥션은 스레드마다 따로 연다 (WAL 모드로 여러 프로세스가 동시에 읽고 씀)
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _count(self, source, field):
+        self._conn().execute(f"INSERT INTO stats (source, {field}) VALUES (?, 1) ON CONFLICT(source) DO UPDATE SET {field} = {field} + 1", (source,))
+
+    def get(self, key, source=""):
+        conn, now = self._conn(), time.time()
+        row = conn.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < now):
+            self._count(source, "misses")
+            return False, None
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self._count(source, "hits")
+        return True, pickle.loads(row[0])
+
+    def set(self, key, value, source="", ttl=None):
+        blob, now = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time()
+        expires = now + ttl if ttl is not None else None
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", (key, source, blob, len(blob), now, expires, now))
+        self.evict()
+
+    def evict(self):
+        # 만료된 항목을 지우고, 용량을 넘으면 가장 오래 안 쓰인 항목부터 90% 수준까지 제거
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes: return
+        target, freed = total - int(self.max_bytes * 0.9), 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            victims.append((key,)); freed += size
+            if freed >= target: break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def clear(self, source=None):
+        if source is None: self._conn().execute("DELETE FROM entries")
+        else: self._conn().execute("DELETE FROM entries WHERE source = ?", (source,))
+
+    def stats(self):
+        # 소스별 항목 수, 용량, 적중률
+        conn = self._conn()
+        sizes = {s: (n, b) for s, n, b in conn.execute("SELECT source, COUNT(*), SUM(size) FROM entries GROUP BY source")}
+        rows = {}
+        for source, hits, misses in conn.execute("SELECT source, hits, misses FROM stats"):
+            n, b = sizes.get(source, (0, 0))
+            rows[source] = {"entries": n, "kb": round((b or 0) / 1024, 1), "hits": hits, "misses": misses,
+                            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0}
+        return rows
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None: _cache = DiskCache()
+        return _cache
+
+def disk_cached(source, ttl=..., cache_if=lambda v: v is not None):
+    # 기존 함수 시그니처는 그대로 두고 디스크 캐시를 끼워 넣는 데코레이터
+    ttl = SOURCE_TTL.get(source) if ttl is ... else ttl
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = make_key(f"{source}:{fn.__name__}", args, kwargs)
+            try:
+                cache = get_cache()
+                found, value = cache.get(key, source)
+                if found: return value
+            except sqlite3.Error:
+                cache = None
+            value = fn(*args, **kwargs)
+            if cache is not None and cache_if(value):
+                try: cache.set(key, value, source, ttl)
+                except sqlite3.Error: pass
+            return value
+        return wrapper
+    return decorator
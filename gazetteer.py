@@ -0,0 +1,140 @@
+import bisect
+import json
+import os
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+# --- 오프라인 도시 사전 (가제티어) ---
+# city_coordinates.json 형식(또는 같은 내용을 담은 압축 .npz)을 읽어
+# 정규화된 이름/별칭에 대해 정렬 키 접두어 색인 + 자모 단위 3-gram 색인을 만든다.
+#   - 접두어 검색: 정렬된 키에서 bisect
+#   - 오타 허용 검색: 3-gram 후보 추출 후 편집 거리로 순위
+# 한글은 자모로 분해해 비교하므로 "도꾜" 처럼 받침/모음 하나 틀린 입력도 가깝게 잡힌다.
+NGRAM = 3
+
+def normalize(text):
+    # 소문자 + 공백/구두점 제거 + 악센트 제거, 한글은 자모(NFD)로 분해
+    text = unicodedata.normalize("NFKD", str(text).strip().lower())
+    return "".join(ch for ch in text if ch.isalnum() and not unicodedata.combining(ch))
+
+def ngrams(key):
+    padded = f"^{key}$"
+    return {padded[i:i + NGRAM] for i in range(max(1, len(padded) - NGRAM + 1))}
+
+def edit_distance(a, b, limit):
+    # limit 를 넘으면 limit + 1 을 돌려주는 제한 레벤슈타인 거리
+    if abs(len(a) - len(b)) > limit: return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        curr = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            curr[j] = min(prev[j] + 1, curr[j-1] + 1, prev[j-1] + (ca != cb))
+        if min(curr) > limit: return limit + 1
+        prev = curr
+    return prev[-1]
+
+class Gazetteer:
+    def __init__(self, cities):
+        # cities: {대표 이름: {"lat", "lon", "code", "country", "aliases": [...]}}
+        self.names = list(cities)
+        self.records = [dict(cities[n], name=n) for n in self.names]
+        keys = defaultdict(set)
+        for idx, name in enumerate(self.names):
+            for label in [name] + list(cities[name].get("aliases", [])):
+                k = normalize(label)
+                if k: keys[k].add(idx)
+        self.keys = sorted(keys)
+        self.key_ids = [sorted(keys[k]) for k in self.keys]
+        self.exact = dict(zip(self.keys, self.key_ids))
+        self.grams = defaultdict(list)
+        for ki, k in enumerate(self.keys):
+            for g in ngrams(k): self.grams[g].append(ki)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path): return cls({})
+        if path.endswith(".npz"):
+            data = np.load(path, allow_pickle=False)
+            cities = {}
+            for name, lat, lon, code, country, aliases in zip(data["name"], data["lat"], data["lon"], data["code"], data["country"], data["aliases"]):
+                cities[str(name)] = {"lat": float(lat), "lon": float(lon), "code": str(code), "country": str(country), "aliases": [a for a in str(aliases).split("|") if a]}
+            return cls(cities)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def save_npz(self, path):
+        # 대용량 도시 목록을 컬럼형 압축 파일로 저장
+        r = self.records
+        np.savez_compressed(path, name=np.array(self.names), lat=np.array([c["lat"] for c in r], dtype=np.float64),
+                            lon=np.array([c["lon"] for c in r], dtype=np.float64), code=np.array([c.get("code", "") for c in r]),
+                            country=np.array([c.get("country", "") for c in r]), aliases=np.array(["|".join(c.get("aliases", [])) for c in r]))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return normalize(name) in self.exact
+
+    def _ids_to_records(self, ids, limit):
+        seen, out = set(), []
+        for i in ids:
+            if i in seen: continue
+            seen.add(i); out.append(self.records[i])
+            if len(out) >= limit: break
+        return out
+
+    def lookup(self, query):
+        # 이름/별칭 정확 일치
+        ids = self.exact.get(normalize(query))
+        return self.records[ids[0]] if ids else None
+
+    def prefix(self, query, limit=8):
+        k = normalize(query)
+        if not k: return []
+        lo = bisect.bisect_left(self.keys, k)
+        hi = bisect.bisect_left(self.keys, k + "\U0010ffff")
+        ids = [i for ki in range(lo, hi) for i in self.key_ids[ki]]
+        return self._ids_to_records(ids, limit)
+
+    def fuzzy(self, query, limit=8, max_distance=None):
+        # 3-gram 후보 -> 편집 거리 순 [(레코드, 거리), ...]
+        k = normalize(query)
+        if not k: return []
+        max_distance = max(1, len(k) // 3) if max_distance is None else max_distance
+        counts = defaultdict(int)
+        for g in ngrams(k):
+            for ki in self.grams.get(g, ()): counts[ki] += 1
+        ranked = []
+        for ki, _ in sorted(counts.items(), key=lambda kv: -kv[1])[:50]:
+            d = edit_distance(k, self.keys[ki], max_distance)
+            if d <= max_distance: ranked.append((d, ki))
+        ranked.sort()
+        out, seen = [], set()
+        for d, ki in ranked:
+            for i in self.key_ids[ki]:
+                if i not in seen:
+                    seen.add(i); out.append((self.records[i], d))
+            if len(out) >= limit: break
+        return out[:limit]
+
+    def labels(self, limit=None):
+        # 자동완성 입력창 옵션: 대표 이름 먼저, 이어서 별칭 (중복 제거)
+        out = list(dict.fromkeys(self.names + [a for r in self.records for a in r.get("aliases", [])]))
+        return out[:limit] if limit else out
+
+    def suggest(self, query, limit=8):
+        # 자동완성: 접두어 일치 우선, 부족하면 오타 허용 결과로 채움
+        out = self.prefix(query, limit)
+        names = {c["name"] for c in out}
+        for rec, _ in self.fuzzy(query, limit):
+            if len(out) >= limit: break
+            if rec["name"] not in names:
+                names.add(rec["name"]); out.append(rec)
+        return out
+
+    def search(self, query):
+        # 이름/별칭 정확 일치만 도시로 인정하고, 없으면 None (네트워크 검색 대상)
+        # 오타 후보는 다른 실제 도시일 수 있으므로 ("Nara" -> "Naha") 바꿔치기하지 않고 suggest 로만 보여 준다
+        return self.lookup(query)
@@ -0,0 +1,65 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import http_client
+from disk_cache import disk_cached
+from singleflight import single_flight
+from timing import timed
+
+# --- Calendarific 조회 ---
+@timed("fetch.holidays")
+@single_flight
+@disk_cached("holidays")
+def get_holidays_for_year(api_key, country_code, year):
+    # 국가·연도별 공휴일을 한 번의 요청으로 조회 (실패 시 None)
+    try:
+        url = "https://calendarific.com/api/v2/holidays"
+        params = {"api_key": api_key, "country": country_code, "year": year}
+        res = http_client.get(url, params=params)
+        res.raise_for_status()
+        return sorted({h["date"]["iso"].split("T")[0] for h in res.json().get("response", {}).get("holidays", []) if h.get("date", {}).get("iso")})
+    except: return None
+
+# --- 연 단위 공휴일 저장소 ---
+# (국가, 연도) 마다 한 번만 받아 정렬된 datetime64[D] 배열로 보관하고,
+# 임의의 기간 조회와 날짜 배열 포함 여부를 메모리에서 벡터 연산으로 처리한다.
+class HolidayStore:
+    def __init__(self, fetch_year):
+        # fetch_year(country_code, year) -> ISO 날짜 문자열 목록, 실패 시 None
+        self.fetch_year = fetch_year
+        self.years = {}
+        self.lock = threading.Lock()
+
+    def year(self, country_code, year):
+        key = (country_code.upper(), int(year))
+        with self.lock:
+            if key in self.years: return self.years[key]
+        raw = self.fetch_year(*key)
+        if raw is None: raise LookupError(f"holidays unavailable: {key[0]} {key[1]}")
+        days = np.unique(np.array(sorted(raw), dtype="datetime64[D]"))
+        with self.lock:
+            self.years[key] = days
+        return days
+
+    def _index(self, country_code, first, last):
+        years = range(pd.Timestamp(first).year, pd.Timestamp(last).year + 1)
+        parts = [self.year(country_code, y) for y in years]
+        return np.concatenate(parts) if parts else np.array([], dtype="datetime64[D]")
+
+    def between(self, country_code, start, end):
+        # start~end (양 끝 포함) 사이의 공휴일
+        if not country_code: return np.array([], dtype="datetime64[D]")
+        s, e = np.datetime64(pd.Timestamp(start).date(), "D"), np.datetime64(pd.Timestamp(end).date(), "D")
+        idx = self._index(country_code, s, e)
+        return idx[np.searchsorted(idx, s, "left"):np.searchsorted(idx, e, "right")]
+
+    def contains(self, country_code, dates):
+        # dates 와 같은 길이의 bool 배열
+        days = pd.DatetimeIndex(dates).to_numpy().astype("datetime64[D]")
+        if not country_code or days.size == 0: return np.zeros(days.size, dtype=bool)
+        idx = self._index(country_code, days.min(), days.max())
+        if idx.size == 0: return np.zeros(days.size, dtype=bool)
+        pos = np.minimum(np.searchsorted(idx, days), idx.size - 1)
+        return idx[pos] == days
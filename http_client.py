@@ -0,0 +1,137 @@
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- 공용 HTTP 클라이언트 ---
+# 호스트별 keep-alive 커넥션 풀 + 기본 타임아웃 + 지터 백오프 재시도 + 토큰 버킷 속도 제한
+DEFAULT_TIMEOUT = (5, 20)  # (connect, read) 초
+USER_AGENT = 'TravelApp_Student_Project/1.0 (contact@example.com)'
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# 설정하면 모든 요청을 이 주소(벤치마크용 스텁 서버 등)로 보낸다. 경로·쿼리는 그대로, 원래 호스트는 X-Upstream-Host 헤더로 전달
+UPSTREAM_OVERRIDE = os.environ.get("TRAVEL_UPSTREAM_URL")
+
+# 호스트별 (초당 요청 수, 버스트 크기)
+RATE_LIMITS = {
+    "nominatim.openstreetmap.org": (1.0, 1),
+    "overpass-api.de": (1.0, 2),
+    "calendarific.com": (5.0, 5),
+    "archive-api.open-meteo.com": (10.0, 10),
+    "open.er-api.com": (2.0, 2),
+    "generativelanguage.googleapis.com": (5.0, 5),
+}
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate, self.capacity = float(rate), float(capacity)
+        self.tokens, self.updated = float(capacity), time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # 토큰이 생길 때까지 대기, 대기한 시간(초)을 반환
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class HttpClient:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=3, backoff=0.5, max_backoff=8.0, rate_limits=RATE_LIMITS, pool_size=10, upstream=UPSTREAM_OVERRIDE):
+        self.timeout, self.retries = timeout, retries
+        self.upstream = upstream
+        self.backoff, self.max_backoff = backoff, max_backoff
+        self.pool_size = pool_size
+        self.buckets = {host: TokenBucket(*limit) for host, limit in rate_limits.items()}
+        self.sessions = {}
+        self.counters = defaultdict(lambda: {"requests": 0, "retries": 0, "errors": 0, "latency_total": 0.0, "latency_max": 0.0, "throttled": 0.0})
+        self.lock = threading.Lock()
+
+    def _session(self, host):
+        with self.lock:
+            if host not in self.sessions:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                s.headers["User-Agent"] = USER_AGENT
+                self.sessions[host] = s
+            return self.sessions[host]
+
+    def _record(self, host, **deltas):
+        with self.lock:
+            c = self.counters[host]
+            for k, v in deltas.items():
+                c[k] = max(c[k], v) if k == "latency_max" else c[k] + v
+
+    def _sleep_before_retry(self, attempt, res=None):
+        # Retry-After 헤더가 있으면 따르고, 없으면 full-jitter 지수 백오프
+        retry_after = res.headers.get("Retry-After") if res is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = min(float(retry_after), self.max_backoff)
+        else:
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        time.sleep(delay)
+
+    def request(self, method, url, retries=None, **kwargs):
+        host = urlsplit(url).hostname or ""
+        session = self._session(host)
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.retries if retries is None else retries
+        bucket = self.buckets.get(host)
+        if self.upstream:
+            # 속도 제한·통계는 원래 호스트 기준으로 유지
+            parts = urlsplit(url)
+            url = self.upstream.rstrip("/") + parts.path + (f"?{parts.query}" if parts.query else "")
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "X-Upstream-Host": host}
+        for attempt in range(retries + 1):
+            if bucket: self._record(host, throttled=bucket.acquire())
+            t0 = time.perf_counter()
+            try:
+                res = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                elapsed = time.perf_counter() - t0
+                self._record(host, requests=1, errors=1, latency_total=elapsed, latency_max=elapsed)
+                if attempt == retries: raise
+                self._record(host, retries=1)
+                self._sleep_before_retry(attempt)
+                continue
+            elapsed = time.perf_counter() - t0
+            self._record(host, requests=1, latency_total=elapsed, latency_max=elapsed)
+            if res.status_code in RETRY_STATUS and attempt < retries:
+                self._record(host, retries=1)
+                self._sleep_before_retry(attempt, res)
+                continue
+            return res
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        # 호스트별 요청/재시도/오류 수와 평균·최대 지연(ms)
+        with self.lock:
+            rows = {}
+            for host, c in self.counters.items():
+                avg = c["latency_total"] / c["requests"] if c["requests"] else 0.0
+                rows[host] = {"requests": c["requests"], "retries": c["retries"], "errors": c["errors"],
+                              "avg_ms": round(avg * 1000, 1), "max_ms": round(c["latency_max"] * 1000, 1),
+                              "throttled_s": round(c["throttled"], 2)}
+            return rows
+
+client = HttpClient()
+get = client.get
+post = client.post
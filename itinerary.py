@@ -0,0 +1,176 @@
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from route_optimizer import EPS, distance_matrix, path_length
+from timing import timed
+
+# --- 날씨 기반 일정 최적화 (방문 순서 + 도시별 체류 일수) ---
+# 도시별 일별 점수 scores[c, d] (calculate_daily_score 의 total_score, d = 여행 0일차부터) 와 이동 거리로
+# "머문 날들의 점수 합 - km_weight x 이동 거리" 가 최대가 되는 순서와 체류 일수를 고른다.
+#   - (방문한 도시 수, 도시, 도착일) DP: 도착일 축 전체를 슬라이딩 윈도 최대로 한 번에 계산하고,
+#     상태마다 최선 경로의 방문 집합(비트마스크)을 들고 다녀 같은 도시를 다시 가지 않게 한다.
+#   - 순서가 정해진 경우의 체류 일수는 (순번, 도착일) DP 로 정확히 풀 수 있어, 거리 최적 루트에 대해서도 풀고 더 나은 쪽을 쓴다.
+#   - 남은 시간(time_budget) 동안 도시 옮기기/맞바꾸기 이웃을 고정 순서 DP 로 한꺼번에 평가해 순서를 다듬는다.
+# 체류 s 박은 도착일 a 부터 a+s-1 일까지 점수를 얻고, a+s 일에 다음 도시에 도착한다. 체류 합은 정확히 total_days.
+KM_WEIGHT = 0.002  # 이동 1 km 당 감점 (500 km ≈ 하루 1점)
+MAX_CITIES = 62    # 방문 집합을 int64 비트마스크로 들고 다님
+NEIGHBOR_REACH = 4 # 순서 개선 단계에서 도시를 옮겨 볼 최대 칸 수
+IMPROVE_BATCH = 64 # 한 번에 평가하는 이웃 수 (묶음 사이마다 남은 시간 확인)
+
+def prefix_scores(scores):
+    # (도시, 일) -> (도시, 일+1) 누적합, NaN(데이터 없음)은 0점
+    scores = np.nan_to_num(np.asarray(scores, dtype=float))
+    return np.concatenate([np.zeros((len(scores), 1)), np.cumsum(scores, axis=1)], axis=1)
+
+def stay_limits(n, total_days, min_stay, max_stay):
+    # 도시 수와 기간에 맞춰 체류 범위를 조정 (불가능하면 ValueError)
+    if n > total_days: raise ValueError(f"{n}개 도시를 {total_days}일 안에 방문할 수 없습니다.")
+    lo = min(min_stay, total_days // n)
+    hi = max(max_stay, -(-total_days // n), lo)
+    return max(lo, 1), hi
+
+def _window_best(G, lo, hi):
+    # out[..., d] = max_{s in [lo, hi]} G[..., d - s] 와 그때의 s (d - s < 0 이면 제외)
+    pad = np.full(G.shape[:-1] + (hi,), -np.inf)
+    windows = sliding_window_view(np.concatenate([pad, G], axis=-1), hi - lo + 1, axis=-1)[..., :G.shape[-1], :]
+    idx = np.argmax(windows, axis=-1)
+    return np.take_along_axis(windows, idx[..., None], axis=-1)[..., 0], hi - idx
+
+def stays_for_order(P, order, lo, hi):
+    # 순서가 고정된 경우의 최적 체류 일수 -> (점수 합, 체류 목록)
+    T = P.shape[1] - 1
+    F = np.full(T + 1, -np.inf)
+    F[0] = 0.0
+    picks = []
+    for c in order:
+        best, s = _window_best(F - P[c], lo, hi)
+        F = P[c] + best
+        picks.append(s)
+    if not np.isfinite(F[T]): return -np.inf, None
+    stays, d = [], T
+    for s in reversed(picks):
+        stays.append(int(s[d])); d -= stays[-1]
+    return float(F[T]), stays[::-1]
+
+def even_stays(n, total_days):
+    # 기존 방식: 균등 분배 (나머지는 앞 도시부터 하루씩)
+    base, extra = divmod(total_days, n)
+    return [base + (i < extra) for i in range(n)]
+
+def stay_score(P, order, stays):
+    arrive = np.concatenate([[0], np.cumsum(stays)[:-1]])
+    return float(sum(P[c, a + s] - P[c, a] for c, a, s in zip(order, arrive, stays)))
+
+def _label_dp(P, D, start, end, round_trip, lo, hi, km_weight):
+    # (방문 수 k, 도시, 도착일) DP -> (목적값, 순서, 체류 목록)
+    n, T = P.shape[0], P.shape[1] - 1
+    bits = np.left_shift(np.int64(1), np.arange(n, dtype=np.int64))
+    cost = km_weight * D
+    V = np.full((n, T + 1), -np.inf)
+    V[start, 0] = 0.0
+    M = np.zeros((n, T + 1), dtype=np.int64)
+    M[start, 0] = bits[start]
+    stay_back, prev_back = [], []
+    days = np.arange(T + 1)
+    for k in range(1, n + 1):
+        # 도시 c 에서 s 박 머물고 d 일에 떠나는 최선
+        best, s = _window_best(V - P, lo, hi)
+        dep = P + best
+        stay_back.append(s)
+        if k == n: break
+        arrive = np.clip(days[None, :] - s, 0, T)
+        dep_mask = np.take_along_axis(M, arrive, axis=1)
+        # d 일에 c -> c2 로 이동 (이미 방문한 도시, 마지막 순서가 아닌 도착 도시는 제외)
+        cand = dep[:, None, :] - cost[:, :, None]
+        cand[(dep_mask[:, None, :] & bits[None, :, None]) != 0] = -np.inf
+        if end is not None and k + 1 < n: cand[:, end, :] = -np.inf
+        if end is not None and k + 1 == n: cand[:, np.arange(n) != end, :] = -np.inf
+        prev = np.argmax(cand, axis=0)
+        V = np.take_along_axis(cand, prev[None], axis=0)[0]
+        M = np.take_along_axis(dep_mask, prev, axis=0) | bits[:, None]
+        prev_back.append(prev)
+    final = dep[:, T] - (cost[:, start] if round_trip else 0.0)
+    if end is not None: final = np.where(np.arange(n) == end, final, -np.inf)
+    c = int(np.argmax(final))
+    if not np.isfinite(final[c]): return -np.inf, None, None
+    order, stays, d = [], [], T
+    for k in range(n, 0, -1):
+        s = int(stay_back[k - 1][c, d])
+        order.append(c); stays.append(s)
+        d -= s
+        if k > 1: c = int(prev_back[k - 2][c, d])
+    return float(final.max()), order[::-1], stays[::-1]
+
+def _order_objectives(P, D, orders, lo, hi, km_weight, start, round_trip):
+    # 여러 순서 (B, n) 의 "최적 체류 점수 합 - 이동 비용" 을 한 번에
+    T = P.shape[1] - 1
+    F = np.full((len(orders), T + 1), -np.inf)
+    F[:, 0] = 0.0
+    for k in range(orders.shape[1]):
+        Pk = P[orders[:, k]]
+        F = Pk + _window_best(F - Pk, lo, hi)[0]
+    km = D[orders[:, :-1], orders[:, 1:]].sum(axis=1) + (D[orders[:, -1], start] if round_trip else 0.0)
+    return F[:, T] - km_weight * km
+
+def _neighbors(order, fixed_last, reach=NEIGHBOR_REACH):
+    # 도시 하나를 reach 칸 이내로 옮기거나 두 도시를 맞바꾼 순서들 (출발 도시와 고정된 도착 도시는 그대로)
+    n = len(order)
+    last = n - 1 if fixed_last else n
+    out = []
+    for i in range(1, last):
+        for j in range(max(1, i - reach), min(last, i + reach + 1)):
+            if j == i: continue
+            moved = order[:i] + order[i + 1:]
+            out.append(moved[:j] + [order[i]] + moved[j:])
+            if j > i:
+                swapped = list(order)
+                swapped[i], swapped[j] = swapped[j], swapped[i]
+                out.append(swapped)
+    return out
+
+def _improve(P, D, order, objective, end, round_trip, lo, hi, km_weight, deadline, batch=IMPROVE_BATCH):
+    # 이웃 순서를 batch 개씩 평가하고 가장 좋은 쪽으로 이동, 개선이 없거나 시간이 다 되면 종료
+    # (시간이 다 되면 그때까지 평가한 이웃 중 더 나은 것이 있으면 그쪽으로 옮기고 멈춘다)
+    start = order[0]
+    while time.perf_counter() < deadline:
+        cands = _neighbors(order, end is not None)
+        if not cands: break
+        best, best_value = None, objective + EPS
+        for i in range(0, len(cands), batch):
+            values = _order_objectives(P, D, np.array(cands[i:i + batch]), lo, hi, km_weight, start, round_trip)
+            j = int(np.argmax(values))
+            if values[j] > best_value: best, best_value = cands[i + j], float(values[j])
+            if time.perf_counter() >= deadline: break
+        if best is None: break
+        order, objective = best, best_value
+    return order, objective
+
+@timed("route.itinerary")
+def plan_itinerary(scores, lats, lons, start=0, end=None, round_trip=False, min_stay=2, max_stay=14, km_weight=KM_WEIGHT, seed_order=None, time_budget=0.3):
+    # scores: (도시, 일) 일별 점수 / seed_order: 비교 기준 순서 (예: optimize_route 결과, 없으면 입력 순서)
+    # 반환: {"order", "stays", "score", "distance", "objective", "limits", "seed": {"order", "stays", "score", "distance"}, "even_score"}
+    # time_budget 은 DP 를 포함한 이 호출 전체의 시간이며, 순서 개선은 남은 시간 동안만 한다
+    deadline = time.perf_counter() + time_budget
+    if round_trip: end = None
+    P = prefix_scores(scores)
+    n, T = P.shape[0], P.shape[1] - 1
+    if n > MAX_CITIES: raise ValueError(f"최대 {MAX_CITIES}개 도시까지 최적화할 수 있습니다.")
+    lo, hi = stay_limits(n, T, min_stay, max_stay)
+    D = distance_matrix(lats, lons)
+    def route_km(order):
+        return path_length(D, list(order) + ([start] if round_trip and n > 1 else []))
+
+    seed = list(seed_order) if seed_order is not None else [start] + [i for i in range(n) if i not in (start, end)] + ([end] if end is not None else [])
+    seed_score, seed_stays = stays_for_order(P, seed, lo, hi)
+    candidates = [(seed_score - km_weight * route_km(seed), seed, seed_stays)]
+    if n > 1: candidates.append(_label_dp(P, D, start, end, round_trip, lo, hi, km_weight))
+    objective, order, stays = max((c for c in candidates if c[1] is not None), key=lambda c: c[0])
+    if n > 2:
+        order, objective = _improve(P, D, list(order), objective, end, round_trip, lo, hi, km_weight, deadline)
+        stays = stays_for_order(P, order, lo, hi)[1]
+    return {"order": [int(i) for i in order], "stays": stays, "score": stay_score(P, order, stays), "distance": route_km(order),
+            "objective": objective, "limits": (lo, hi),
+            "seed": {"order": seed, "stays": seed_stays, "score": seed_score, "distance": route_km(seed)},
+            "even_score": stay_score(P, seed, even_stays(n, T))}
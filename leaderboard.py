@@ -0,0 +1,121 @@
+import argparse
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from climatology import ClimateStore
+from gazetteer import Gazetteer
+from holiday_store import HolidayStore, get_holidays_for_year
+from ranking import rank_windows, window_score_matrix
+from scoring import MODE_USE_HOLIDAYS, PRIORITY_MODES, calculate_daily_score
+
+# --- 도시별 최적 여행 시기 리더보드 ---
+# 여러 도시에 대해 calculate_daily_score + 윈도우 랭킹을 프로세스 풀에서 돌리고,
+# 도시마다 가장 좋은 기간 하나를 골라 점수순으로 정렬한다.
+# 날씨는 climatology(.npy), 공휴일은 디스크 캐시를 통해 프로세스 간에 재사용된다.
+# 워커는 spawn 으로 띄운다: fork 하면 부모의 sqlite 커넥션과 (Streamlit 서버의) 스레드·락 상태를 그대로 물려받는다.
+# Streamlit 없이도 쓸 수 있다:  python leaderboard.py --start 2026-11-01 --end 2027-01-31 --nights 5
+CITY_DATA_PATH = os.environ.get("TRAVEL_CITY_DATA", "city_coordinates.json")
+
+_stores = {}
+
+def _holiday_store(api_key):
+    # 워커 프로세스마다 하나씩 (연도 데이터는 디스크 캐시에서 읽힘)
+    if api_key not in _stores:
+        _stores[api_key] = HolidayStore(lambda country_code, year: get_holidays_for_year(api_key, country_code, year) if api_key else [])
+    return _stores[api_key]
+
+def _mask(store, country_code, dates, missing):
+    # 조회에 실패하면 휴일 없이 계산하고 missing 에 국가 코드를 남긴다
+    try: return store.contains(country_code, dates)
+    except LookupError:
+        missing.append(country_code)
+        return np.zeros(len(dates), dtype=bool)
+
+def score_city(city, start, end, nights, priority_mode=MODE_USE_HOLIDAYS, api_key=None):
+    # city: {"name", "lat", "lon", "code"} -> 최적 기간 한 줄 (데이터가 없으면 None)
+    climate = ClimateStore().get(city['lat'], city['lon'])
+    if climate is None: return None
+    hs, he = pd.Timestamp(start) - pd.DateOffset(years=1), pd.Timestamp(end) - pd.DateOffset(years=1)
+    df = climate.frame(hs, he)
+    if len(df) < nights: return None
+    store, missing = _holiday_store(api_key), []
+    trip_dates = df.index + pd.DateOffset(years=1)
+    df = calculate_daily_score(df, _mask(store, city.get('code'), trip_dates, missing), _mask(store, "KR", trip_dates, missing), priority_mode, trip_dates)
+    best = rank_windows(df, nights, 1, window_score_matrix(df['total_score'].to_numpy(), [nights]), [nights])
+    if not best: return None
+    i, scr = best[0]
+    win = df.iloc[i : i + nights]
+    return {"도시": city['name'], "국가": city.get('country', city.get('code', '')), "점수": round(scr, 2),
+            "시작일": trip_dates[i].strftime('%Y-%m-%d'), "종료일": trip_dates[i + nights - 1].strftime('%Y-%m-%d'),
+            "평균 기온": round(float(win['temperature_2m_max'].mean()), 1), "강수 합계": round(float(win['precipitation_sum'].sum()), 1),
+            "휴일": int(win['is_free_day'].sum()), "공휴일 누락": ", ".join(missing)}
+
+def _score_city_args(args):
+    return score_city(*args)
+
+def build_leaderboard(cities, start, end, nights=5, priority_mode=MODE_USE_HOLIDAYS, api_key=None, workers=None):
+    # cities: 도시 레코드 목록 -> 점수 내림차순 DataFrame
+    if api_key:
+        # 모든 워커가 쓰는 한국 공휴일은 미리 받아 디스크 캐시를 데워 둔다
+        _mask(_holiday_store(api_key), "KR", pd.date_range(start, end), [])
+    jobs = [(c, start, end, nights, priority_mode, api_key) for c in cities]
+    if workers == 1:
+        rows = list(map(_score_city_args, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            rows = list(pool.map(_score_city_args, jobs, chunksize=max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))))
+    board = pd.DataFrame([r for r in rows if r])
+    if board.empty: return board
+    board = board.sort_values("점수", ascending=False, kind="stable").reset_index(drop=True)
+    board.index += 1
+    if not board["공휴일 누락"].any(): board = board.drop(columns="공휴일 누락")
+    return board
+
+def missing_holidays(board):
+    # 공휴일을 불러오지 못해 휴일 없이 점수를 낸 도시 이름들
+    if board.empty or "공휴일 누락" not in board: return []
+    return board.loc[board["공휴일 누락"] != "", "도시"].tolist()
+
+def select_cities(gazetteer, names=None):
+    # 이름 목록이 없으면 가제티어 전체, 있으면 이름/별칭으로 찾은 도시만
+    if not names: return list(gazetteer.records)
+    found = [gazetteer.search(n) for n in names]
+    return list({c['name']: c for c in found if c}.values())
+
+def main(argv=None):
+    today = date.today()
+    parser = argparse.ArgumentParser(description="도시별 최적 여행 시기 리더보드")
+    parser.add_argument("--start", default=str(today + timedelta(30)), help="검색 시작일 (YYYY-MM-DD)")
+    parser.add_argument("--end", default=str(today + timedelta(90)), help="검색 종료일 (YYYY-MM-DD)")
+    parser.add_argument("--nights", type=int, default=5)
+    parser.add_argument("--mode", choices=PRIORITY_MODES, default=MODE_USE_HOLIDAYS)
+    parser.add_argument("--cities", default="", help="쉼표로 구분한 도시 이름 (기본: 전체)")
+    parser.add_argument("--city-data", default=CITY_DATA_PATH)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--api-key", default=os.environ.get("CALENDARIFIC_KEY"), help="Calendarific API 키 (없으면 공휴일 제외)")
+    parser.add_argument("--out", default="", help="결과 저장 경로 (.csv 또는 .json)")
+    args = parser.parse_args(argv)
+
+    start, end = datetime.strptime(args.start, "%Y-%m-%d").date(), datetime.strptime(args.end, "%Y-%m-%d").date()
+    gazetteer, names = Gazetteer.load(args.city_data), [n.strip() for n in args.cities.split(",") if n.strip()]
+    for name in names:
+        if gazetteer.search(name) is None:
+            hint = ", ".join(c['name'] for c in gazetteer.suggest(name, 3))
+            print(f"경고: '{name}' 은(는) 도시 목록에 없어 제외합니다." + (f" (혹시: {hint})" if hint else ""), file=sys.stderr)
+    cities = select_cities(gazetteer, names)
+    board = build_leaderboard(cities, start, end, args.nights, args.mode, args.api_key, args.workers)
+    if args.out.endswith(".json"): board.to_json(args.out, orient="records", force_ascii=False)
+    elif args.out: board.to_csv(args.out, encoding="utf-8-sig")
+    else: print(board.to_string())
+    missing = missing_holidays(board)
+    if missing: print(f"경고: 공휴일을 불러오지 못해 휴일 없이 계산한 도시 {len(missing)}곳: {', '.join(missing)}", file=sys.stderr)
+    return 0 if not board.empty else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
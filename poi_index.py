@@ -0,0 +1,129 @@
+import math
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+
+# --- POI 저장소 ---
+# 지역(도시 중심 좌표)마다 모든 테마 태그를 하나의 Overpass union 쿼리로 받아
+# 격자(grid) 버킷 공간 색인에 넣고, 테마/반경/Top-N 질의는 메모리에서 처리한다.
+# 여러 도시가 필요하면 한 쿼리에 도시별 around 구문을 모두 넣어 한 번에 받는다.
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+AREA_RADIUS = 3000   # 지역당 수집 반경 (m)
+CELL_DEG = 0.01      # 격자 한 칸 크기 (위도 기준 약 1.1 km)
+EARTH_RADIUS_M = 6371000
+MAX_AREAS = 256      # 메모리에 유지할 지역 수 (LRU)
+
+def parse_tag(osm_tag):
+    # '"amenity"="restaurant"' -> ("amenity", "restaurant")
+    key, value = osm_tag.split("=", 1)
+    return key.strip().strip('"'), value.strip().strip('"')
+
+def area_key(lat, lon):
+    return (round(float(lat), 3), round(float(lon), 3))
+
+def union_query(centers, osm_tags, radius=AREA_RADIUS):
+    parts = []
+    for lat, lon in centers:
+        for tag in osm_tags:
+            for kind in ("node", "way"):
+                parts.append(f"{kind}[{tag}][\"name\"](around:{radius}, {lat}, {lon});")
+    return f"[out:json][timeout:60];({''.join(parts)});out center tags;"
+
+def haversine_m(lat, lon, lats, lons):
+    phi1, phi2 = math.radians(lat), np.radians(lats)
+    dphi, dlambda = phi2 - phi1, np.radians(lons) - math.radians(lon)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+class AreaIndex:
+    def __init__(self, elements, theme_tags):
+        # theme_tags: {테마: osm_tag}, 각 장소는 해당하는 테마 비트마스크를 가진다
+        self.themes = list(theme_tags)
+        matchers = [parse_tag(theme_tags[t]) for t in self.themes]
+        names, lats, lons, masks, seen = [], [], [], [], set()
+        for el in elements:
+            tags = el.get("tags", {})
+            name = tags.get("name")
+            plat = el.get("lat") or el.get("center", {}).get("lat")
+            plon = el.get("lon") or el.get("center", {}).get("lon")
+            if not name or plat is None or plon is None or (el.get("type"), el.get("id")) in seen: continue
+            mask = sum(1 << i for i, (k, v) in enumerate(matchers) if tags.get(k) == v)
+            if not mask: continue
+            seen.add((el.get("type"), el.get("id")))
+            names.append(name); lats.append(plat); lons.append(plon); masks.append(mask)
+        self.names = np.array(names, dtype=object)
+        self.lats, self.lons = np.array(lats, dtype=float), np.array(lons, dtype=float)
+        self.masks = np.array(masks, dtype=np.int64)
+        self.cells = defaultdict(list)
+        for i, (la, lo) in enumerate(zip(self.lats, self.lons)):
+            self.cells[(int(la // CELL_DEG), int(lo // CELL_DEG))].append(i)
+        self.cells = {k: np.array(v) for k, v in self.cells.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _candidates(self, lat, lon, radius):
+        # 반경을 덮는 격자 칸들의 장소 인덱스
+        dlat = radius / 111320 / CELL_DEG
+        dlon = radius / (111320 * max(math.cos(math.radians(lat)), 1e-6)) / CELL_DEG
+        ci, cj = int(lat // CELL_DEG), int(lon // CELL_DEG)
+        buckets = [self.cells[(i, j)] for i in range(ci - math.ceil(dlat), ci + math.ceil(dlat) + 1)
+                   for j in range(cj - math.ceil(dlon), cj + math.ceil(dlon) + 1) if (i, j) in self.cells]
+        return np.concatenate(buckets) if buckets else np.array([], dtype=int)
+
+    def query(self, theme, lat, lon, radius=AREA_RADIUS, top_n=10):
+        # 테마에 해당하고 반경 안에 있는 장소를 가까운 순으로 top_n 개
+        idx = self._candidates(lat, lon, radius)
+        if theme in self.themes and idx.size:
+            idx = idx[(self.masks[idx] & (1 << self.themes.index(theme))) != 0]
+        else:
+            idx = idx[:0]
+        dist = haversine_m(lat, lon, self.lats[idx], self.lons[idx])
+        keep = dist <= radius
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")[:top_n]
+        idx, dist = idx[order], dist[order]
+        return pd.DataFrame({
+            "장소명": self.names[idx].tolist(),
+            "거리": [f"{d / 1000:.1f} km" for d in dist],
+            "지도 보기": [f"https://www.google.com/maps/search/?api=1&query={la},{lo}" for la, lo in zip(self.lats[idx], self.lons[idx])],
+        })
+
+class PoiStore:
+    def __init__(self, fetch_elements, theme_tags, radius=AREA_RADIUS):
+        # fetch_elements(centers, osm_tags, radius) -> Overpass elements 목록, 실패 시 None
+        self.fetch_elements, self.theme_tags, self.radius = fetch_elements, dict(theme_tags), radius
+        self.areas = OrderedDict()
+        self.lock = threading.Lock()
+
+    def ensure(self, centers):
+        # 아직 없는 지역만 모아 한 번의 요청으로 받는다. 받지 못한 지역 수를 반환
+        keys = list(dict.fromkeys(area_key(la, lo) for la, lo in centers))
+        with self.lock:
+            missing = [k for k in keys if k not in self.areas]
+        if not missing: return 0
+        elements = self.fetch_elements(tuple(missing), tuple(self.theme_tags.values()), self.radius)
+        if elements is None: return len(missing)
+        # 각 장소를 반경 안의 모든 지역에 배정
+        located = [el for el in elements if (el.get("lat") or el.get("center", {}).get("lat")) is not None]
+        lats = np.array([el.get("lat") or el["center"]["lat"] for el in located], dtype=float)
+        lons = np.array([el.get("lon") or el["center"]["lon"] for el in located], dtype=float)
+        built = {}
+        for k in missing:
+            near = np.flatnonzero(haversine_m(k[0], k[1], lats, lons) <= self.radius * 1.05)
+            built[k] = AreaIndex([located[i] for i in near], self.theme_tags)
+        with self.lock:
+            self.areas.update(built)
+            while len(self.areas) > MAX_AREAS: self.areas.popitem(last=False)
+        return 0
+
+    def query(self, lat, lon, theme, radius=None, top_n=10):
+        # 지역을 받지 못했으면 None (장소가 없는 지역은 빈 DataFrame)
+        self.ensure([(lat, lon)])
+        with self.lock:
+            index = self.areas.get(area_key(lat, lon))
+            if index is not None: self.areas.move_to_end(area_key(lat, lon))
+        if index is None: return None
+        return index.query(theme, lat, lon, radius or self.radius, top_n)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from timing import timed
+
+# --- 여행 기간 랭킹 엔진 ---
+# calculate_daily_score 결과(total_score)를 누적합으로 한 번에 처리해
+# (여행 기간 x 시작일) 평균 점수 행렬을 만들고, Top-k 만 부분 선택한다.
+MIN_NIGHTS, MAX_NIGHTS = 3, 14
+DURATIONS = np.arange(MIN_NIGHTS, MAX_NIGHTS + 1)
+
+@timed("rank.window_matrix")
+def window_score_matrix(scores, durations=DURATIONS):
+    # 행: 기간, 열: 시작일 / 기간이 범위를 벗어나거나 유효 데이터가 없으면 NaN
+    x = np.asarray(scores, dtype=float)
+    durs = np.asarray(durations, dtype=int)
+    n = len(x)
+    valid = ~np.isnan(x)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(valid, x, 0.0))))
+    ccnt = np.concatenate(([0], np.cumsum(valid)))
+    starts = np.arange(n)
+    ends = starts[None, :] + durs[:, None]
+    fits = ends <= n
+    ends = np.minimum(ends, n)
+    sums = csum[ends] - csum[starts][None, :]
+    cnts = ccnt[ends] - ccnt[starts][None, :]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / cnts
+    return np.where(fits & (cnts > 0), means, np.nan)
+
+def top_k_starts(row, k=3):
+    # 점수 내림차순, 동점이면 이른 시작일 우선
+    row = np.asarray(row, dtype=float)
+    idx = np.flatnonzero(~np.isnan(row))
+    if idx.size > k:
+        idx = idx[np.argpartition(-row[idx], k - 1)[:k]]
+    return idx[np.lexsort((idx, -row[idx]))]
+
+@timed("rank.windows")
+def rank_windows(df, dur, k=3, matrix=None, durations=DURATIONS):
+    # [(시작 위치, 평균 점수), ...] - 윈도우 프레임은 보관하지 않는다
+    if matrix is None:
+        matrix, durations = window_score_matrix(df['total_score'].to_numpy(), [dur]), [dur]
+    row = matrix[list(durations).index(dur)]
+    return [(int(i), float(row[i])) for i in top_k_starts(row, k)]
+
+def heatmap_frame(index, matrix, durations=DURATIONS, offset=pd.DateOffset(years=1)):
+    # 시작일 x 기간 히트맵용 long-format 데이터
+    dates = pd.DatetimeIndex(index) + offset
+    heat = pd.DataFrame(matrix.T, index=dates, columns=list(durations))
+    heat.index.name, heat.columns.name = "시작일", "기간(박)"
+    return heat.stack().rename("점수").reset_index()
@@ -0,0 +1,84 @@
+import copy
+import functools
+import io
+import os
+import tempfile
+
+import http_client
+from timing import timed
+
+# --- PDF 리포트 렌더링 ---
+# 폰트 파일은 프로세스당 한 번만 확보하고, PDF 는 디스크를 거치지 않고 바이트로 바로 만든다.
+# fpdf2 는 실제로 쓰인 글자만 골라 폰트를 서브셋으로 임베드한다.
+# 폰트 파싱(cmap·글자 폭 표)도 프로세스당 한 번만 하고, PDF 마다 그 결과를 공유한다.
+# 서브셋은 출력할 때 폰트 테이블을 그 자리에서 줄이므로, 테이블만 메모리의 폰트 바이트에서 새로 연다.
+FONT_PATH = "NanumGothic.ttf"
+FONT_URL = "https://github.com/google/fonts/raw/main/ofl/nanumgothic/NanumGothic-Regular.ttf"
+
+@functools.lru_cache(maxsize=1)
+def download_korean_font(font_path=FONT_PATH):
+    if not os.path.exists(font_path):
+        r = http_client.get(FONT_URL, timeout=(5, 60))
+        r.raise_for_status()
+        # 여러 프로세스가 동시에 받아도 깨진 파일이 보이지 않도록 임시 파일에 쓰고 교체
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(font_path)), suffix=".ttf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(r.content)
+        os.replace(tmp, font_path)
+    return font_path
+
+FONT_FAMILY = "Nanum"
+
+@functools.lru_cache(maxsize=1)
+def _parsed_font():
+    # (파싱된 폰트, 폰트 파일 바이트) - 프로세스당 한 번
+    from fpdf import FPDF  # 내보내기를 누를 때만 불러온다 (앱 시작 시간 절약)
+    path = download_korean_font()
+    template = FPDF()
+    template.add_font(FONT_FAMILY, '', path)
+    with open(path, "rb") as f:
+        return template.fonts[FONT_FAMILY.lower()], f.read()
+
+def _new_pdf():
+    from fpdf import FPDF
+    from fpdf.fonts import SubsetMap
+    from fontTools.ttLib import TTFont
+    parsed, data = _parsed_font()
+    # 글자 폭·글리프 표는 공유하고, 문서마다 달라지는 서브셋과 (출력 시 변경되는) 폰트 테이블만 새로 만든다
+    font = copy.deepcopy(parsed, {id(parsed.cw): parsed.cw, id(parsed.glyph_ids): parsed.glyph_ids, id(parsed.subset): None})
+    font.ttfont = TTFont(io.BytesIO(data), recalcTimestamp=False, lazy=True)
+    font.subset = SubsetMap(font)
+    pdf = FPDF()
+    pdf.fonts[font.fontkey] = font
+    return pdf
+
+def _write_report(pdf, title, content_list):
+    pdf.add_page()
+    pdf.set_font(FONT_FAMILY, '', 16)
+    pdf.cell(0, 10, title, ln=True, align='C')
+    pdf.ln(10)
+    pdf.set_font(FONT_FAMILY, '', 10)
+    for line in content_list:
+        pdf.multi_cell(0, 8, line)
+        pdf.ln(2)
+
+@timed("report.pdf")
+def create_pdf_report(title, content_list):
+    pdf = _new_pdf()
+    _write_report(pdf, title, content_list)
+    return bytes(pdf.output())
+
+@timed("report.pdf_batch")
+def create_pdf_batch(reports):
+    # reports: [(제목, 줄 목록), ...] -> 보고서마다 새 페이지로 시작하는 PDF 하나 (폰트는 한 번만 로드)
+    pdf = _new_pdf()
+    for title, content_list in reports:
+        _write_report(pdf, title, content_list)
+    return bytes(pdf.output())
+
+def lazy_pdf_report(title, content_list):
+    # st.download_button 에 넘기면 클릭했을 때만 렌더링된다
+    return lambda: create_pdf_report(title, list(content_list))
+
+def lazy_pdf_batch(reports):
+    return lambda: create_pdf_batch([(t, list(c)) for t, c in reports])
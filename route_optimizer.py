@@ -0,0 +1,119 @@
+import time
+
+import numpy as np
+
+from timing import timed
+
+# --- 루트 최적화 ---
+# 하버사인 거리 행렬을 한 번에 만들고, 최근접 이웃으로 시작해 2-opt / Or-opt 지역 탐색으로 개선한다.
+# 내부적으로는 항상 "첫 노드와 마지막 노드가 고정된 경로"로 다룬다.
+#   - 도착지 자유: 모든 노드와 거리 0 인 가상 노드를 끝에 둔다
+#   - 왕복: 출발지의 복사본을 끝에 둔다
+EARTH_RADIUS_KM = 6371
+EPS = 1e-9
+
+def distance_matrix(lats, lons):
+    lat, lon = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+    dphi = lat[:, None] - lat[None, :]
+    dlambda = lon[:, None] - lon[None, :]
+    a = np.sin(dphi / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def path_length(D, path):
+    path = np.asarray(path)
+    return float(D[path[:-1], path[1:]].sum()) if len(path) > 1 else 0.0
+
+def nearest_neighbor(D, start, end=None):
+    n = len(D)
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    if end is not None: visited[end] = True
+    path, curr = [start], start
+    for _ in range(n - visited.sum()):
+        d = np.where(visited, np.inf, D[curr])
+        curr = int(np.argmin(d))
+        visited[curr] = True
+        path.append(curr)
+    if end is not None and end != start: path.append(end)
+    return path
+
+def two_opt_pass(D, p, deadline):
+    # 구간 뒤집기: 위치 i~j 를 뒤집어 거리가 줄면 적용. 줄어든 거리 합을 반환
+    gain, m = 0.0, len(p)
+    for i in range(1, m - 2):
+        if time.perf_counter() > deadline: break
+        j = np.arange(i + 1, m - 1)
+        delta = D[p[i-1], p[j]] + D[p[i], p[j+1]] - D[p[i-1], p[i]] - D[p[j], p[j+1]]
+        k = int(np.argmin(delta))
+        if delta[k] < -EPS:
+            jj = j[k]
+            p[i:jj+1] = p[i:jj+1][::-1]
+            gain -= float(delta[k])
+    return gain
+
+def or_opt_pass(D, p, deadline, max_seg=3):
+    # 길이 1~3 구간을 다른 간선 사이로 옮기기 (뒤집어 넣기 포함)
+    gain = 0.0
+    for seg_len in range(1, max_seg + 1):
+        i = 1
+        while i + seg_len < len(p):
+            if time.perf_counter() > deadline: return gain
+            m = len(p)
+            s0, s1, prev, nxt = p[i], p[i+seg_len-1], p[i-1], p[i+seg_len]
+            removed = D[prev, s0] + D[s1, nxt] - D[prev, nxt]
+            k = np.concatenate((np.arange(0, i - 1), np.arange(i + seg_len, m - 1)))
+            if k.size == 0: i += 1; continue
+            u, v = p[k], p[k+1]
+            fwd = D[u, s0] + D[s1, v] - D[u, v]
+            rev = D[u, s1] + D[s0, v] - D[u, v]
+            best_fwd, best_rev = int(np.argmin(fwd)), int(np.argmin(rev))
+            reverse = rev[best_rev] < fwd[best_fwd]
+            best = best_rev if reverse else best_fwd
+            delta = (rev if reverse else fwd)[best] - removed
+            if delta < -EPS:
+                seg = p[i:i+seg_len][::-1] if reverse else p[i:i+seg_len].copy()
+                at = k[best]
+                rest = np.concatenate((p[:i], p[i+seg_len:]))
+                at = at if at < i else at - seg_len
+                p[:] = np.concatenate((rest[:at+1], seg, rest[at+1:]))
+                gain -= float(delta)
+            else:
+                i += 1
+    return gain
+
+@timed("route.optimize")
+def optimize_route(lats, lons, start=0, end=None, round_trip=False, time_budget=0.5):
+    # 반환: {"order": 방문 순서(입력 인덱스), "distance": 최종 거리, "stages": [(단계, 누적 거리), ...]}
+    n = len(lats)
+    D = distance_matrix(lats, lons)
+    if n <= 2:
+        order = [start] + [i for i in range(n) if i != start]
+        dist = path_length(D, order + ([start] if round_trip and n > 1 else []))
+        return {"order": order, "distance": dist, "stages": [("입력 순서", dist), ("최근접 이웃", dist), ("2-opt", dist), ("Or-opt", dist)]}
+    deadline = time.perf_counter() + time_budget
+
+    # 끝 고정 노드를 붙인 확장 행렬
+    ext = np.zeros((n + 1, n + 1))
+    ext[:n, :n] = D
+    if round_trip:
+        ext[n, :n] = ext[:n, n] = D[start]
+    tail = end if (end is not None and not round_trip) else n
+
+    original = [start] + [i for i in range(n) if i not in (start, tail)] + [tail]
+    nn = nearest_neighbor(ext[:n, :n], start, None if tail == n else tail)
+    if tail == n: nn = nn + [n]
+    p = np.array(nn)
+
+    stages = [("입력 순서", path_length(ext, original)), ("최근접 이웃", path_length(ext, p))]
+    gains = {"2-opt": 0.0, "Or-opt": 0.0}
+    while time.perf_counter() < deadline:
+        g2 = two_opt_pass(ext, p, deadline)
+        g3 = or_opt_pass(ext, p, deadline)
+        gains["2-opt"] += g2; gains["Or-opt"] += g3
+        if g2 + g3 < EPS: break
+    after_nn = stages[-1][1]
+    stages.append(("2-opt", float(after_nn - gains["2-opt"])))
+    stages.append(("Or-opt", float(after_nn - gains["2-opt"] - gains["Or-opt"])))
+
+    order = [int(i) for i in p if i != n]
+    return {"order": order, "distance": path_length(ext, p), "stages": stages}
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from timing import timed
+
+# --- 일별 점수 계산 ---
+MODE_USE_HOLIDAYS = "연차 효율 (휴일 포함)"
+MODE_SAVE_COST = "비용 절감 (휴일 제외)"
+PRIORITY_MODES = [MODE_USE_HOLIDAYS, MODE_SAVE_COST]
+
+@timed("score.daily")
+def calculate_daily_score(df, local_holidays, kr_holidays, priority_mode, trip_dates=None):
+    # local_holidays / kr_holidays: df 행과 같은 길이의 bool 배열 (holiday_mask)
+    # trip_dates: df 행에 대응하는 실제 여행 날짜 (작년 날씨를 쓰는 경우), 주말도 공휴일과 같은 달력으로 판정한다
+    df['is_local_holiday'] = np.asarray(local_holidays, dtype=bool)
+    df['is_kr_holiday'] = np.asarray(kr_holidays, dtype=bool)
+    df['is_weekend'] = pd.DatetimeIndex(df.index if trip_dates is None else trip_dates).dayofweek >= 5
+    df['is_free_day'] = df['is_kr_holiday'] | df['is_weekend']
+    df['score_weather'] = 10 - abs(df['temperature_2m_max'] - 23)
+    df['score_rain'] = -df['precipitation_sum'] * 2
+    if priority_mode == MODE_SAVE_COST:
+        df['score_busy'] = (df['is_local_holiday'] | df['is_kr_holiday'] | df['is_weekend']).astype(int) * -10
+        df['score_free'] = 0 
+    else:
+        df['score_busy'] = (df['is_local_holiday'] | df['is_weekend']).astype(int) * -5
+        df['score_free'] = df['is_free_day'].astype(int) * 5
+    df['total_score'] = df['score_weather'] + df['score_rain'] + df['score_busy'] + df['score_free']
+    return df
@@ -0,0 +1,58 @@
+import functools
+import threading
+from collections import defaultdict
+
+from disk_cache import make_key
+
+# --- 동시 요청 병합 (single-flight) ---
+# 같은 인자로 동시에 들어온 호출은 먼저 온 호출(leader) 하나만 실제로 실행하고,
+# 나머지는 그 결과(또는 예외)를 그대로 받아 간다. 여러 세션이 같은 도시를 동시에 검색할 때 업스트림 중복 호출을 막는다.
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result, self.error = None, None
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.counters = defaultdict(lambda: {"calls": 0, "executed": 0, "coalesced": 0})
+
+    def do(self, name, key, fn, *args, **kwargs):
+        with self.lock:
+            self.counters[name]["calls"] += 1
+            call = self.inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self.inflight[key] = _Call()
+                self.counters[name]["executed"] += 1
+            else:
+                self.counters[name]["coalesced"] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None: raise call.error
+            return call.result
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        with self.lock:
+            return {name: dict(c, coalesced_ratio=round(c["coalesced"] / c["calls"], 3) if c["calls"] else 0.0) for name, c in self.counters.items()}
+
+group = SingleFlight()
+
+def single_flight(fn):
+    # 함수 이름 + 정규화된 인자를 키로 병합
+    name = fn.__name__
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return group.do(name, make_key(name, args, kwargs), fn, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,69 @@
+import contextlib
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+# --- 단계별 시간 측정 ---
+# 업스트림 조회·점수 계산·랭킹·루트 최적화·PDF 생성 같은 단계를 span 으로 기록한다.
+# 프로세스 전체가 하나의 recorder 를 공유하고, 최근 MAX_SPANS 개만 보관한다.
+MAX_SPANS = 5000
+
+class SpanRecorder:
+    def __init__(self, maxlen=MAX_SPANS):
+        self.records = deque(maxlen=maxlen)
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        started, t0, ok = time.time(), time.perf_counter(), True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            record = {"name": name, "start": round(started, 3), "ms": round((time.perf_counter() - t0) * 1000, 3),
+                      "ok": ok, "thread": threading.current_thread().name, **attrs}
+            with self.lock:
+                self.records.append(record)
+
+    def timed(self, name):
+        # 함수 호출 전체를 name span 으로 감싸는 데코레이터
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def spans(self):
+        with self.lock:
+            return list(self.records)
+
+    def summary(self):
+        # span 이름별 호출 수, 합계·평균·최대(ms), 예외 수
+        rows = {}
+        for r in self.spans():
+            row = rows.setdefault(r["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0})
+            row["count"] += 1
+            row["total_ms"] += r["ms"]
+            row["max_ms"] = max(row["max_ms"], r["ms"])
+            row["errors"] += not r["ok"]
+        for row in rows.values():
+            row["avg_ms"] = round(row["total_ms"] / row["count"], 3)
+            row["total_ms"] = round(row["total_ms"], 3)
+        return rows
+
+    def to_json(self):
+        return json.dumps({"summary": self.summary(), "spans": self.spans()}, ensure_ascii=False, indent=2)
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+recorder = SpanRecorder()
+span = recorder.span
+timed = recorder.timed